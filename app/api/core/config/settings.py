@@ -46,8 +46,20 @@ class Settings(BaseSettings):
         description="PostgreSQL connection string",
         env="POSTGRES_DSN"
     )
-    POSTGRES_MIN_POOL_SIZE: int = Field(default=5, description="Minimum number of connections in the pool")
-    POSTGRES_MAX_POOL_SIZE: int = Field(default=20, description="Maximum number of connections in the pool")
+    POSTGRES_MIN_POOL_SIZE: int = Field(default=10, description="Minimum number of connections in the pool")
+    POSTGRES_MAX_POOL_SIZE: int = Field(default=50, description="Maximum number of connections in the pool")
+    POSTGRES_MAX_QUERIES: int = Field(
+        default=50_000,
+        description="Queries after which a pooled PostgreSQL connection is replaced"
+    )
+    POSTGRES_MAX_INACTIVE_CONNECTION_LIFETIME: float = Field(
+        default=300.0,
+        description="Seconds after which an idle pooled PostgreSQL connection is closed"
+    )
+    POSTGRES_STATEMENT_CACHE_SIZE: int = Field(
+        default=256,
+        description="Prepared statements cached per PostgreSQL connection"
+    )
     
     REDIS_DSN: str = Field(
         default="redis://localhost:6379/0",
@@ -55,6 +67,12 @@ class Settings(BaseSettings):
         env="REDIS_DSN"
     )
     
+    PIPELINE_WORKER_ENABLED: bool = Field(
+        default=False,
+        description="Run pipelines in pipeline worker processes instead of the API process",
+        env="PIPELINE_WORKER_ENABLED"
+    )
+    
     CLICKHOUSE_URL: str = Field(
         default="clickhouse://localhost:9000",
         description="ClickHouse connection string",
@@ -81,6 +99,7 @@ class Settings(BaseSettings):
     CLICKHOUSE_USER: str = os.getenv("CLICKHOUSE_USER", "default")
     CLICKHOUSE_PASSWORD: str = os.getenv("CLICKHOUSE_PASSWORD", "")
     CLICKHOUSE_DB: str = os.getenv("CLICKHOUSE_DB", "default")
+    CLICKHOUSE_COMPRESSION: str = os.getenv("CLICKHOUSE_COMPRESSION", "lz4")
     
     QUESTDB_HOST: str = os.getenv("QUESTDB_HOST", "localhost")
     QUESTDB_PORT: int = int(os.getenv("QUESTDB_PORT", "9000"))
@@ -3,12 +3,15 @@ Database connection pool management with integrated recovery procedures.
 """
 from typing import AsyncGenerator, Dict, Any, Optional
 from contextlib import asynccontextmanager
+import asyncio
 import asyncpg
+import orjson
 import redis.asyncio as redis
 from clickhouse_connect.driver.client import Client
 from questdb.ingress import Sender
 import nats
 import logging
+from prometheus_client import Gauge
 
 from ..config.settings import settings
 from .error_handling import with_database_retry
@@ -17,6 +20,37 @@ from ..logging.logger import logger
 
 logger = logging.getLogger(__name__)
 
+POSTGRES_POOL_CONNECTIONS = Gauge(
+    'postgres_pool_connections',
+    'PostgreSQL pool connections by state',
+    ['state']
+)
+
+def _encode_jsonb(value: Any) -> bytes:
+    """Encode a value as binary jsonb; bytes are taken as pre-encoded JSON."""
+    # Binary jsonb is a version byte (1) followed by the JSON text
+    if isinstance(value, bytes):
+        return b'\x01' + value
+    return b'\x01' + orjson.dumps(value)
+
+async def _init_postgres_connection(conn: asyncpg.Connection) -> None:
+    """Register orjson-backed JSON codecs on a new PostgreSQL connection."""
+    await conn.set_type_codec(
+        'jsonb',
+        encoder=_encode_jsonb,
+        decoder=lambda data: orjson.loads(data[1:]),
+        schema='pg_catalog',
+        format='binary'
+    )
+    # Binary json is the bare JSON text, so orjson's bytes need no decoding
+    await conn.set_type_codec(
+        'json',
+        encoder=orjson.dumps,
+        decoder=orjson.loads,
+        schema='pg_catalog',
+        format='binary'
+    )
+
 class DatabasePool:
     """Manages database connection pools with integrated recovery."""
     
@@ -26,6 +60,13 @@ class DatabasePool:
         self._redis_pool: Optional[redis.Redis] = None
         self._initialized = False
         self._recovery_manager = None
+        # Pool gauges are read on each scrape, not sampled by a task
+        POSTGRES_POOL_CONNECTIONS.labels(state="open").set_function(
+            lambda: self.pool_stats()["size"]
+        )
+        POSTGRES_POOL_CONNECTIONS.labels(state="idle").set_function(
+            lambda: self.pool_stats()["free"]
+        )
     
     def set_recovery_manager(self, recovery_manager):
         """Set the recovery manager instance."""
@@ -41,7 +82,13 @@ class DatabasePool:
             self._postgres_pool = await asyncpg.create_pool(
                 dsn=settings.POSTGRES_DSN,
                 min_size=settings.POSTGRES_MIN_POOL_SIZE,
-                max_size=settings.POSTGRES_MAX_POOL_SIZE
+                max_size=settings.POSTGRES_MAX_POOL_SIZE,
+                # asyncpg prepares each distinct query text once per
+                # connection and reuses it; size the cache for all hot queries
+                statement_cache_size=settings.POSTGRES_STATEMENT_CACHE_SIZE,
+                max_queries=settings.POSTGRES_MAX_QUERIES,
+                max_inactive_connection_lifetime=settings.POSTGRES_MAX_INACTIVE_CONNECTION_LIFETIME,
+                init=_init_postgres_connection
             )
             logger.info("PostgreSQL connection pool initialized")
             
@@ -85,6 +132,39 @@ class DatabasePool:
         await self._init_redis_pool()
         self._initialized = True
     
+    async def warmup(self) -> None:
+        """Run a cheap query on min_size PostgreSQL connections at once.
+        
+        Opens any missing connections and runs their init before traffic
+        arrives; concurrent acquires make each query use its own connection.
+        """
+        if not self._initialized:
+            await self.init_pools()
+        pool = self._postgres_pool
+        
+        async def ping() -> None:
+            async with pool.acquire() as conn:
+                await conn.fetchval("SELECT 1")
+        
+        await asyncio.gather(*(ping() for _ in range(pool.get_min_size())))
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """Current PostgreSQL pool size, idle connections and limits."""
+        pool = self._postgres_pool
+        if pool is None:
+            return {"size": 0, "free": 0, "min_size": 0, "max_size": 0}
+        return {
+            "size": pool.get_size(),
+            "free": pool.get_idle_size(),
+            "min_size": pool.get_min_size(),
+            "max_size": pool.get_max_size()
+        }
+    
+    def get_active_connections(self) -> int:
+        """Number of PostgreSQL connections currently checked out."""
+        stats = self.pool_stats()
+        return stats["size"] - stats["free"]
+    
     async def cleanup(self) -> None:
         """Cleanup all database pools."""
         try:
@@ -131,7 +211,8 @@ class DatabasePool:
             port=settings.CLICKHOUSE_PORT,
             username=settings.CLICKHOUSE_USER,
             password=settings.CLICKHOUSE_PASSWORD,
-            database=settings.CLICKHOUSE_DB
+            database=settings.CLICKHOUSE_DB,
+            compress=settings.CLICKHOUSE_COMPRESSION
         )
         try:
             yield client
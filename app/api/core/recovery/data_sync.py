@@ -32,6 +32,13 @@ async def recover_data_sync_operation(
     start_time = time.time()
     track_sync_recovery_attempt(source_type)
     
+    # Single log context reused (and updated in place) for every log call
+    log_extra = {
+        "source_id": source_id,
+        "sync_id": sync_id,
+        "source_type": source_type
+    }
+    
     try:
         async with db_pool.postgres_connection() as conn:
             # Get current sync status
@@ -42,12 +49,13 @@ async def recover_data_sync_operation(
             """, source_id)
             
             if not source:
-                logger.error(f"Data source {source_id} not found")
+                logger.error("Data source not found", extra=log_extra)
                 return
             
             # Update source type if not provided in context
             if source_type == "unknown":
                 source_type = source["type"]
+                log_extra["source_type"] = source_type
             
             if source["last_sync_status"] == SyncStatus.FAILED:
                 # Reset sync status
@@ -76,14 +84,12 @@ async def recover_data_sync_operation(
                     RETURNING id
                 """, source_id, SyncStatus.PENDING, sync_id)
                 
-                logger.info(
-                    f"Created recovery sync for source {source_id}",
-                    extra={
-                        "new_sync_id": new_sync_id,
-                        "parent_sync_id": sync_id,
-                        "source_type": source_type
-                    }
-                )
+                log_extra["new_sync_id"] = new_sync_id
+                log_extra["parent_sync_id"] = sync_id
+                logger.info("Created recovery sync", extra=log_extra)
+                
+                # From here on the context describes the recovery sync
+                log_extra["sync_id"] = new_sync_id
                 
                 # Trigger sync service if provided in context
                 if "sync_service" in context:
@@ -91,31 +97,21 @@ async def recover_data_sync_operation(
                         source_id,
                         sync_id=new_sync_id
                     )
-                    logger.info(
-                        f"Triggered recovery sync for source {source_id}",
-                        extra={
-                            "sync_id": new_sync_id,
-                            "source_type": source_type
-                        }
-                    )
+                    logger.info("Triggered recovery sync", extra=log_extra)
                 
                 # Track successful recovery
+                duration = time.time() - start_time
                 track_sync_recovery_success(source_type)
-                track_sync_recovery_duration(
-                    source_type,
-                    time.time() - start_time
-                )
+                track_sync_recovery_duration(source_type, duration)
+            else:
+                duration = time.time() - start_time
+            
+            log_extra["duration"] = duration
+            logger.info("Data sync recovery completed", extra=log_extra)
     
     except Exception as e:
-        logger.error(
-            f"Failed to recover sync operation",
-            extra={
-                "source_id": source_id,
-                "sync_id": sync_id,
-                "source_type": source_type,
-                "error": str(e)
-            }
-        )
+        log_extra["error"] = str(e)
+        logger.error("Failed to recover sync operation", extra=log_extra)
         raise
 
 async def register_data_sync_recovery(recovery_manager) -> None:
@@ -1,7 +1,7 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 import logging
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, validator
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +45,33 @@ def validate_event(event_data: Dict[str, Any]) -> None:
             raise EventValidationError(f"Missing required fields: {', '.join(missing_fields)}")
         raise EventValidationError(str(e))
 
+class IngestEvent(Event):
+    """Event as received for ingest; properties may arrive JSON-encoded."""
+    properties: Union[Dict[str, Any], str] = Field(
+        default_factory=dict,
+        description="Event properties, or the same as an encoded JSON object"
+    )
+
+# Built once; pydantic compiles the IngestEvent schema into its core validator
+_event_adapter = TypeAdapter(IngestEvent)
+
+def split_valid_event_json(events: List[bytes]) -> Tuple[List[bytes], List[bytes]]:
+    """Split raw JSON-encoded events into (valid, invalid) lists.
+    
+    Each payload is validated straight from its bytes, without first
+    decoding it to a dict; the payloads themselves are returned unchanged.
+    """
+    validate = _event_adapter.validate_json
+    valid, invalid = [], []
+    for event in events:
+        try:
+            validate(event)
+        except ValidationError:
+            invalid.append(event)
+        else:
+            valid.append(event)
+    return valid, invalid
+
 def validate_batch_events(events: List[Dict[str, Any]]) -> None:
     """Validate multiple events in a batch."""
     errors = []
@@ -5,42 +5,84 @@ from ..config import settings
 logger = logging.getLogger(__name__)
 
 # Schema definitions
-EVENTS_TABLE = """
-CREATE TABLE IF NOT EXISTS events (
+# Column definitions are shared between each table and its archive twin:
+# MOVE PARTITION ... TO TABLE requires identical structure. Monotonic
+# timestamps use Delta+ZSTD, high-cardinality strings use ZSTD(3).
+EVENTS_COLUMNS = """
     event_id UUID,
-    timestamp DateTime,
+    timestamp DateTime CODEC(Delta, ZSTD(1)),
     event_type LowCardinality(String),
     source LowCardinality(String),
-    user_id String,
-    organization_id String,
+    user_id String CODEC(ZSTD(3)),
+    organization_id String CODEC(ZSTD(3)),
     properties JSON,
     metadata JSON,
-    processed_at DateTime,
-    _partition_date Date
-)
-ENGINE = MergeTree()
-PARTITION BY toYYYYMM(_partition_date)
-ORDER BY (timestamp, event_type, event_id)
-TTL timestamp + INTERVAL 3 MONTH;
+    processed_at DateTime CODEC(Delta, ZSTD(1)),
+    _partition_date Date CODEC(Delta, ZSTD(1))
 """
 
-METRICS_TABLE = """
-CREATE TABLE IF NOT EXISTS metrics (
+METRICS_COLUMNS = """
     metric_id UUID,
-    timestamp DateTime,
+    timestamp DateTime CODEC(Delta, ZSTD(1)),
     name LowCardinality(String),
-    value Float64,
+    value Float64 CODEC(Gorilla, ZSTD(1)),
     labels JSON,
     source LowCardinality(String),
-    organization_id String,
-    _partition_date Date
-)
+    organization_id String CODEC(ZSTD(3)),
+    _partition_date Date CODEC(Delta, ZSTD(1))
+"""
+
+EVENTS_TABLE = f"""
+CREATE TABLE IF NOT EXISTS events ({EVENTS_COLUMNS})
+ENGINE = MergeTree()
+PARTITION BY toYYYYMM(_partition_date)
+ORDER BY (timestamp, event_type, event_id)
+TTL timestamp + INTERVAL 3 MONTH;
+"""
+
+EVENTS_ARCHIVE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS events_archive ({EVENTS_COLUMNS})
+ENGINE = MergeTree()
+PARTITION BY toYYYYMM(_partition_date)
+ORDER BY (timestamp, event_type, event_id);
+"""
+
+METRICS_TABLE = f"""
+CREATE TABLE IF NOT EXISTS metrics ({METRICS_COLUMNS})
 ENGINE = MergeTree()
 PARTITION BY toYYYYMM(_partition_date)
 ORDER BY (timestamp, name, metric_id)
 TTL timestamp + INTERVAL 6 MONTH;
 """
 
+METRICS_ARCHIVE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS metrics_archive ({METRICS_COLUMNS})
+ENGINE = MergeTree()
+PARTITION BY toYYYYMM(_partition_date)
+ORDER BY (timestamp, name, metric_id);
+"""
+
+def _codec_migration(table: str, columns: str) -> str:
+    """ALTER TABLE that applies the column codecs to an existing table.
+    
+    CREATE TABLE IF NOT EXISTS leaves tables created before the codecs
+    were added unchanged; new parts are written with the new codecs and
+    existing parts are recompressed as they merge.
+    """
+    clauses = []
+    for line in columns.strip().splitlines():
+        name, _, definition = line.strip().rstrip(",").partition(" ")
+        if "CODEC(" in definition:
+            clauses.append(f"MODIFY COLUMN {name} {definition[definition.index('CODEC('):]}")
+    return f"ALTER TABLE {table} " + ", ".join(clauses) + ";"
+
+CODEC_MIGRATIONS = [
+    _codec_migration("events", EVENTS_COLUMNS),
+    _codec_migration("events_archive", EVENTS_COLUMNS),
+    _codec_migration("metrics", METRICS_COLUMNS),
+    _codec_migration("metrics_archive", METRICS_COLUMNS)
+]
+
 LOGS_TABLE = """
 CREATE TABLE IF NOT EXISTS logs (
     log_id UUID,
@@ -116,7 +158,9 @@ class ClickHouseSchema:
         
         schemas = [
             EVENTS_TABLE,
+            EVENTS_ARCHIVE_TABLE,
             METRICS_TABLE,
+            METRICS_ARCHIVE_TABLE,
             LOGS_TABLE,
             TRACES_TABLE,
             HOURLY_METRICS_VIEW,
@@ -130,6 +174,14 @@ class ClickHouseSchema:
             except Exception as e:
                 logger.error(f"Error creating schema: {str(e)}")
                 raise
+        
+        # Bring tables created before the codecs were defined up to date
+        for migration in CODEC_MIGRATIONS:
+            try:
+                await clickhouse.execute(migration)
+            except Exception as e:
+                logger.error(f"Error applying column codecs: {str(e)}")
+                raise
     
     @staticmethod
     async def verify_schema():
@@ -138,7 +190,9 @@ class ClickHouseSchema:
         
         required_objects = [
             "events",
+            "events_archive",
             "metrics",
+            "metrics_archive",
             "logs",
             "traces",
             "hourly_metrics",
@@ -19,4 +19,4 @@ else
 fi
 
 # Start the application
-exec uvicorn app.api.main:app --host 0.0.0.0 --port 8000 --reload 
\ No newline at end of file
+exec uvicorn app.api.main:app --host 0.0.0.0 --port 8000 --loop uvloop --reload 
\ No newline at end of file
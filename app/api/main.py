@@ -28,6 +28,7 @@ from app.api.core.errors.error_handler import (
 from .core.middleware.logging import LoggingMiddleware
 from .core.recovery.procedures import register_common_procedures
 from .core.monitoring.service import monitoring_service
+from .services.pipeline_executor import pipeline_executor
 from .routers import (
     analytics, auth, data_sources, health,
     ingestion, organizations, pipelines,
@@ -123,6 +124,9 @@ async def shutdown_event():
         # Stop monitoring service
         await monitoring_service.stop()
         
+        # Write queued pipeline logs while the pools are still open
+        await pipeline_executor.shutdown()
+        
         # Close database pools
         await db_pool.cleanup()
         
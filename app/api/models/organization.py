@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field, UUID4, EmailStr
 from typing import Optional, Dict, Any, List, Annotated
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 from pydantic.types import constr
 
 class OrganizationStatus(str, Enum):
@@ -33,7 +34,15 @@ class OrganizationUpdate(OrganizationBase):
     name: Optional[str] = None
     api_key: Optional[str] = None
 
-class Organization(BaseModel):
+class RecordModel(BaseModel):
+    """Base for models loaded from trusted database rows"""
+
+    @classmethod
+    def from_record(cls, row):
+        """Build the model from a database row without re-validating it"""
+        return cls.model_construct(**dict(row))
+
+class Organization(RecordModel):
     """Organization model for customer management"""
     org_id: UUID4
     name: str
@@ -49,7 +58,7 @@ class Organization(BaseModel):
     class Config:
         from_attributes = True
 
-class APIKey(BaseModel):
+class APIKey(RecordModel):
     """API Key model for customer authentication"""
     key_id: UUID4
     org_id: UUID4
@@ -64,7 +73,7 @@ class APIKey(BaseModel):
     class Config:
         from_attributes = True
 
-class RetentionPolicy(BaseModel):
+class RetentionPolicy(RecordModel):
     """Data retention policy for customer data"""
     policy_id: UUID4
     org_id: UUID4
@@ -114,8 +123,9 @@ class OrganizationLimits(BaseModel):
     features: List[str]
 
     @classmethod
+    @lru_cache(maxsize=None)
     def get_tier_limits(cls, tier: SubscriptionTier) -> "OrganizationLimits":
-        """Get limits for a subscription tier"""
+        """Get limits for a subscription tier (cached; treat as read-only)"""
         limits = {
             SubscriptionTier.FREE: {
                 "max_events_per_second": 100,
@@ -171,7 +181,7 @@ class OrganizationLimits(BaseModel):
         }
         return cls(**limits[tier])
 
-class OnboardingStatus(BaseModel):
+class OnboardingStatus(RecordModel):
     """Customer onboarding status tracking"""
     org_id: UUID4
     steps_completed: List[str]
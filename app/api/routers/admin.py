@@ -31,7 +31,16 @@ async def get_current_admin_user(token_data = Depends(get_current_user_token)):
 @router.get("/system/status")
 async def get_system_status(admin = Depends(get_current_admin_user)) -> Dict[str, Any]:
     """Get current system status"""
-    return admin_service.get_system_status()
+    return await admin_service.get_system_status()
+
+@router.get("/overview")
+async def get_admin_overview(admin = Depends(get_current_admin_user)) -> Dict[str, Any]:
+    """Get system status, metrics and alerts configuration in one call"""
+    return {
+        "status": await admin_service.get_system_status(),
+        "metrics": admin_service.get_metrics_config().model_dump(),
+        "alerts": admin_service.get_alerts_config().model_dump()
+    }
 
 @router.get("/system/config")
 async def get_system_config() -> SystemConfig:
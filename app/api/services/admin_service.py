@@ -1,5 +1,5 @@
-import json
 import os
+import time
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from fastapi import HTTPException
@@ -24,6 +24,7 @@ class AdminService:
         self.query_optimizer = QueryOptimizer()
         self.metrics_collector = metrics
         self._resource_tracker_initialized = False
+        self._boot_time: Optional[float] = None
         
     async def _ensure_resource_tracker(self):
         """Ensure resource tracker is initialized"""
@@ -104,7 +105,7 @@ class AdminService:
         """Load system configuration from file"""
         try:
             with open(self.config_path, 'r') as f:
-                self.config = SystemConfig(**json.load(f))
+                self.config = SystemConfig.model_validate_json(f.read())
         except FileNotFoundError:
             # Initialize with default config if file doesn't exist
             self.config = self._get_default_config()
@@ -114,7 +115,7 @@ class AdminService:
         """Save current configuration to file"""
         os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
         with open(self.config_path, 'w') as f:
-            json.dump(self.config.dict(), f, indent=2)
+            f.write(self.config.model_dump_json(indent=2))
             
     def _get_default_config(self) -> SystemConfig:
         """Get default system configuration"""
@@ -197,10 +198,12 @@ class AdminService:
     def _get_system_uptime(self) -> float:
         """Get system uptime in seconds"""
         try:
-            with open('/proc/uptime', 'r') as f:
-                uptime_seconds = float(f.readline().split()[0])
-            return uptime_seconds
-        except:
+            # Boot time never changes, so read it once instead of
+            # opening /proc/uptime on every call
+            if self._boot_time is None:
+                self._boot_time = psutil.boot_time()
+            return max(time.time() - self._boot_time, 0.0)
+        except Exception:
             return 0.0
 
     def get_active_alerts(self) -> List[Dict[str, Any]]:
@@ -1,23 +1,92 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from datetime import datetime
+import asyncio
 import logging
 from ..core.database import db_pool, DatabaseError
 
 logger = logging.getLogger(__name__)
 
+# Let ClickHouse serve repeated monitoring queries from its query cache
+_QUERY_CACHE_SETTINGS = "SETTINGS use_query_cache = 1, query_cache_ttl = 60"
+
+# Filters are applied in PREWHERE so only the filter columns are read
+# before rows are discarded; wide columns (tags, payload) are decoded for
+# matching rows only
+_METRICS_SELECT = """
+        SELECT
+            timestamp,
+            name,
+            value,
+            tags
+        FROM metrics
+        PREWHERE timestamp >= %(start_time)s
+        AND timestamp < %(end_time)s
+        """
+
+_EVENTS_SELECT = """
+        SELECT
+            timestamp,
+            name,
+            event_type,
+            severity,
+            tags,
+            payload
+        FROM events
+        PREWHERE timestamp >= %(start_time)s
+        AND timestamp < %(end_time)s
+        """
+
+# Static query text per combination of optional filters, so identical
+# requests always send byte-identical SQL
+_METRICS_QUERIES = {
+    False: _METRICS_SELECT + _QUERY_CACHE_SETTINGS,
+    True: _METRICS_SELECT + "AND name IN %(metric_names)s\n" + _QUERY_CACHE_SETTINGS
+}
+
+_EVENTS_QUERIES = {
+    (False, False): _EVENTS_SELECT + _QUERY_CACHE_SETTINGS,
+    (True, False): _EVENTS_SELECT + "AND event_type IN %(event_types)s\n" + _QUERY_CACHE_SETTINGS,
+    (False, True): _EVENTS_SELECT + "AND severity IN %(severity)s\n" + _QUERY_CACHE_SETTINGS,
+    (True, True): (
+        _EVENTS_SELECT
+        + "AND event_type IN %(event_types)s\n"
+        + "AND severity IN %(severity)s\n"
+        + _QUERY_CACHE_SETTINGS
+    )
+}
+
 class ClickhouseService:
     """Service for interacting with ClickHouse database."""
     
     async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Execute a query against ClickHouse."""
+        return [row async for row in self.iter_query(query, params)]
+    
+    async def iter_query(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream query results as row dicts without building the full result list.
+        
+        Rows arrive in blocks from the client's row block stream; the
+        client is blocking, so the stream is opened and each block read
+        in a worker thread. Only the current block is held in memory.
+        """
         try:
             async with db_pool.clickhouse_connection() as client:
-                result = await client.execute(query, params or {}, with_column_types=True)
-                rows, columns = result
-                
-                # Convert rows to dictionaries with column names
-                column_names = [col[0] for col in columns]
-                return [dict(zip(column_names, row)) for row in rows]
+                stream = await asyncio.to_thread(
+                    client.query_row_block_stream, query, parameters=params or {}
+                )
+                with stream:
+                    # Bind the builtins locally so the per-row loop skips
+                    # global lookups
+                    column_names = tuple(stream.source.column_names)
+                    dict_, zip_, next_ = dict, zip, next
+                    blocks = iter(stream)
+                    while (block := await asyncio.to_thread(next_, blocks, None)) is not None:
+                        for row in block:
+                            yield dict_(zip_(column_names, row))
         except Exception as e:
             logger.error(f"Error executing ClickHouse query: {e}")
             raise
@@ -29,27 +98,13 @@ class ClickhouseService:
         metric_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """Get metrics data for a specific time range."""
-        query = """
-        SELECT
-            timestamp,
-            name,
-            value,
-            tags
-        FROM metrics
-        WHERE timestamp >= %(start_time)s
-        AND timestamp < %(end_time)s
-        """
-        
-        if metric_names:
-            query += " AND name IN %(metric_names)s"
-        
         params = {
             "start_time": start_time,
             "end_time": end_time,
             "metric_names": metric_names
         }
         
-        return await self.execute_query(query, params)
+        return await self.execute_query(_METRICS_QUERIES[bool(metric_names)], params)
     
     async def get_events(
         self,
@@ -59,24 +114,29 @@ class ClickhouseService:
         severity: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """Get events data for a specific time range."""
-        query = """
-        SELECT
-            timestamp,
-            name,
-            event_type,
-            severity,
-            tags,
-            payload
-        FROM events
-        WHERE timestamp >= %(start_time)s
-        AND timestamp < %(end_time)s
-        """
-        
-        if event_types:
-            query += " AND event_type IN %(event_types)s"
-        if severity:
-            query += " AND severity IN %(severity)s"
-        
+        query, params = self._build_events_query(start_time, end_time, event_types, severity)
+        return await self.execute_query(query, params)
+    
+    async def iter_events(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        event_types: Optional[List[str]] = None,
+        severity: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream events for a specific time range; use for large ranges."""
+        query, params = self._build_events_query(start_time, end_time, event_types, severity)
+        async for row in self.iter_query(query, params):
+            yield row
+    
+    def _build_events_query(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        event_types: Optional[List[str]],
+        severity: Optional[List[str]]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build the events query and its parameters."""
         params = {
             "start_time": start_time,
             "end_time": end_time,
@@ -84,7 +144,7 @@ class ClickhouseService:
             "severity": severity
         }
         
-        return await self.execute_query(query, params)
+        return _EVENTS_QUERIES[(bool(event_types), bool(severity))], params
 
 # Create a singleton instance
 clickhouse_service = ClickhouseService() 
\ No newline at end of file
@@ -1,22 +1,96 @@
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple, Deque
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
 import logging
 import json
+import time
 import asyncio
 
+from ..core.config.settings import settings
 from ..core.database import db_pool, DatabaseError
 
 from .pipeline import pipeline_service
 from .materialize import materialize_service
+from .clickhouse import clickhouse_service
 
 logger = logging.getLogger(__name__)
 
+# Event tables whose recent volume is reported by the data flow monitor
+MONITORED_EVENT_TABLES = (
+    'user_interaction_events',
+    'performance_events',
+    'video_events',
+    'log_events'
+)
+
+# Most data flow samples held while QuestDB is unreachable; the oldest are
+# dropped beyond this (one day of samples at one per minute)
+_MAX_FLOW_SAMPLES = 1440
+
+# One round-trip for all monitored tables
+_RECENT_EVENT_COUNTS_QUERY = "\nUNION ALL\n".join(
+    f"SELECT '{table}' AS source_table, count() AS events FROM {table} "
+    f"WHERE timestamp >= now() - INTERVAL 5 MINUTE"
+    for table in MONITORED_EVENT_TABLES
+)
+
+# ClickHouse tables retention policies may archive; policy data types are
+# interpolated into SQL, so anything outside this set is rejected
+ALLOWED_ARCHIVE_TABLES = frozenset(MONITORED_EVENT_TABLES) | frozenset({
+    'infrastructure_metrics',
+    'metrics',
+    'events'
+})
+
+_MOVE_PARTITION_QUERIES = {
+    table: f"ALTER TABLE {table} MOVE PARTITION ID %s TO TABLE {table}_archive"
+    for table in ALLOWED_ARCHIVE_TABLES
+}
+
+# Row-level archive for tables whose partitions cannot be moved by date:
+# copy the expired rows, then delete them with a mutation
+_ARCHIVE_ROWS_QUERIES = {
+    table: (
+        f"INSERT INTO {table}_archive SELECT * FROM {table} "
+        f"WHERE timestamp < %(archive_date)s",
+        f"ALTER TABLE {table} DELETE WHERE timestamp < %(archive_date)s"
+    )
+    for table in ALLOWED_ARCHIVE_TABLES
+}
+
+# Newest date held by each partition of the given tables. Parts of tables
+# without a date-based partition key carry zero bounds (newest is
+# 1970-01-01); those tables are archived row by row instead.
+_PARTITION_BOUNDS_QUERY = """
+    SELECT
+        table,
+        partition_id,
+        greatest(max(max_date), toDate(max(max_time))) AS newest
+    FROM system.parts
+    WHERE active
+    AND database = currentDatabase()
+    AND table IN %(tables)s
+    GROUP BY table, partition_id
+"""
+
+_NO_PARTITION_DATE = date(1970, 1, 1)
+
 class DataFlowService:
     """Service for managing data flow between storage systems"""
     
-    def __init__(self):
+    def __init__(self, questdb_flush_samples: int = 5):
         self._running = False
         self._tasks = []
+        # Data flow samples are buffered and sent to QuestDB as one ILP batch
+        # every questdb_flush_samples samples; each row keeps its own timestamp
+        self._questdb_flush_samples = max(1, questdb_flush_samples)
+        self._flow_samples: Deque[Tuple[datetime, Dict[str, Any]]] = deque(
+            maxlen=_MAX_FLOW_SAMPLES
+        )
+        # Cap concurrent view refreshes so they cannot starve the pool
+        self._refresh_semaphore = asyncio.Semaphore(
+            max(1, settings.POSTGRES_MAX_POOL_SIZE // 2)
+        )
     
     async def start(self):
         """Start the data flow service"""
@@ -47,6 +121,12 @@ class DataFlowService:
             task.cancel()
         await asyncio.gather(*self._tasks, return_exceptions=True)
         self._tasks = []
+        
+        # Send any buffered data flow samples
+        try:
+            await self._flush_flow_samples()
+        except Exception as e:
+            logger.error(f"Error flushing data flow metrics: {str(e)}")
     
     async def _archive_old_data(self):
         """Archive old data based on retention policies"""
@@ -57,25 +137,53 @@ class DataFlowService:
                     policies = await conn.fetch(
                         "SELECT * FROM retention_policies WHERE archival_enabled = true"
                     )
+                
+                # Archive cutoff per table; tables are shared between
+                # organizations, so the shortest retention period wins
+                now = datetime.utcnow()
+                cutoffs = {}
+                for policy in policies:
+                    table = policy['data_type']
+                    if table not in ALLOWED_ARCHIVE_TABLES:
+                        logger.error(f"Refusing to archive unknown data type: {table!r}")
+                        continue
                     
-                    for policy in policies:
-                        # Archive data older than retention period
-                        archive_date = datetime.utcnow() - timedelta(days=policy['retention_days'])
+                    cutoff = (now - timedelta(days=policy['retention_days'])).date()
+                    if table not in cutoffs or cutoff > cutoffs[table]:
+                        cutoffs[table] = cutoff
+                
+                if cutoffs:
+                    async with db_pool.clickhouse_connection() as client:
+                        # One system.parts scan covers every policy
+                        partitions = await client.execute(
+                            _PARTITION_BOUNDS_QUERY,
+                            {'tables': list(cutoffs)}
+                        )
+                        
+                        # Whole partitions past the cutoff are moved to the
+                        # archive table, a metadata-only operation; the
+                        # partition still inside the window waits until it
+                        # ages out entirely
+                        undated_tables = set()
+                        for table, partition_id, newest in partitions:
+                            if newest == _NO_PARTITION_DATE:
+                                undated_tables.add(table)
+                            elif newest < cutoffs[table]:
+                                # partition_id comes from system.parts, not user input
+                                await client.execute(
+                                    _MOVE_PARTITION_QUERIES[table] % f"'{partition_id}'"
+                                )
                         
-                        async with db_pool.clickhouse_connection() as client:
-                            # Move data to archive table
-                            await client.execute(f"""
-                                INSERT INTO {policy['data_type']}_archive
-                                SELECT *
-                                FROM {policy['data_type']}
-                                WHERE timestamp < %(archive_date)s
-                            """, {'archive_date': archive_date})
-                            
-                            # Delete archived data
-                            await client.execute(f"""
-                                ALTER TABLE {policy['data_type']}
-                                DELETE WHERE timestamp < %(archive_date)s
-                            """, {'archive_date': archive_date})
+                        # Tables not partitioned by date fall back to
+                        # copying and deleting the expired rows
+                        for table in undated_tables:
+                            logger.warning(
+                                f"Table {table} is not partitioned by date, "
+                                f"archiving rows instead of partitions"
+                            )
+                            params = {'archive_date': cutoffs[table]}
+                            for query in _ARCHIVE_ROWS_QUERIES[table]:
+                                await client.execute(query, params)
                 
                 # Sleep for 1 hour before next archive check
                 await asyncio.sleep(3600)
@@ -87,42 +195,28 @@ class DataFlowService:
         """Sync materialized views based on refresh intervals"""
         while self._running:
             try:
-                now = datetime.utcnow()
+                mono = time.monotonic()
                 
-                # Check each view's refresh interval
+                # Collect views whose refresh interval has elapsed
+                due = []
                 for view in materialize_service._views.values():
-                    # Parse refresh interval string to timedelta
-                    interval_parts = view.refresh_interval.split()
-                    if len(interval_parts) != 2:
-                        logger.error(f"Invalid refresh interval format for view {view.name}: {view.refresh_interval}")
+                    if view.refresh_interval_seconds is None:
                         continue
-                        
-                    value = int(interval_parts[0])
-                    unit = interval_parts[1].lower()
-                    
-                    if unit.endswith('s'):  # Remove plural 's'
-                        unit = unit[:-1]
-                        
-                    # Convert to seconds
-                    seconds = {
-                        'second': 1,
-                        'minute': 60,
-                        'hour': 3600,
-                        'day': 86400
-                    }.get(unit)
                     
-                    if not seconds:
-                        logger.error(f"Invalid time unit in refresh interval for view {view.name}: {unit}")
-                        continue
-                        
-                    interval = timedelta(seconds=value * seconds)
-                    
-                    if (not view.last_refresh or 
-                        now - view.last_refresh > interval):
-                        # Refresh the view
-                        async with db_pool.postgres_connection() as conn:
-                            await conn.execute(f"REFRESH MATERIALIZED VIEW {view.name}")
-                            view.last_refresh = now
+                    if view.next_refresh_at is None or mono >= view.next_refresh_at:
+                        due.append(view)
+                
+                # Wall-clock time is only needed to record refreshes
+                now = datetime.utcnow() if due else None
+                
+                # Refresh due views concurrently, one connection each
+                results = await asyncio.gather(
+                    *(self._refresh_view(view, now, mono) for view in due),
+                    return_exceptions=True
+                )
+                for view, result in zip(due, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Error refreshing view {view.name}: {str(result)}")
                 
                 # Sleep for 10 seconds before next check
                 await asyncio.sleep(10)
@@ -130,33 +224,33 @@ class DataFlowService:
                 logger.error(f"Error in view synchronization: {str(e)}")
                 await asyncio.sleep(60)  # Retry after 1 minute
     
+    async def _refresh_view(self, view, now: datetime, mono: float):
+        """Refresh a single materialized view on its own pooled connection"""
+        async with self._refresh_semaphore:
+            async with db_pool.postgres_connection() as conn:
+                await conn.execute(f"REFRESH MATERIALIZED VIEW {view.name}")
+        view.last_refresh = now
+        view.next_refresh_at = mono + view.refresh_interval_seconds
+    
     async def _monitor_data_flow(self):
         """Monitor data flow and report metrics"""
         while self._running:
             try:
                 metrics = {
-                    'timestamp': datetime.utcnow(),
+                    'timestamp': datetime.now(timezone.utc),
                     'metrics': {}
                 }
                 
                 # Get event counts from ClickHouse
-                async with db_pool.clickhouse_connection() as client:
-                    for table in ['user_interaction_events', 'performance_events', 
-                                'video_events', 'log_events']:
-                        count = await client.execute(f"""
-                            SELECT count()
-                            FROM {table}
-                            WHERE timestamp >= now() - INTERVAL 5 MINUTE
-                        """)
-                        metrics['metrics'][f'{table}_count_5m'] = count[0][0]
+                async for row in clickhouse_service.iter_query(_RECENT_EVENT_COUNTS_QUERY):
+                    metrics['metrics'][f"{row['source_table']}_count_5m"] = row['events']
                 
-                # Store metrics in QuestDB
-                async with db_pool.questdb_connection() as sender:
-                    await sender.write(
-                        'data_flow_metrics',
-                        symbols={'metric_type': 'event_count'},
-                        columns=metrics['metrics']
-                    )
+                # Buffer the sample; store in QuestDB once the batch is full
+                if len(self._flow_samples) == _MAX_FLOW_SAMPLES:
+                    logger.warning("Data flow sample buffer full, dropping the oldest sample")
+                self._flow_samples.append((metrics['timestamp'], metrics['metrics']))
+                if len(self._flow_samples) >= self._questdb_flush_samples:
+                    await self._flush_flow_samples()
                 
                 # Sleep for 1 minute before next check
                 await asyncio.sleep(60)
@@ -164,5 +258,29 @@ class DataFlowService:
                 logger.error(f"Error in data flow monitoring: {str(e)}")
                 await asyncio.sleep(60)  # Retry after 1 minute
 
+    async def _flush_flow_samples(self):
+        """Write buffered data flow samples to QuestDB in a single ILP flush"""
+        if not self._flow_samples:
+            return
+        
+        # Samples stay buffered until the write succeeds
+        samples = list(self._flow_samples)
+        async with db_pool.questdb_connection() as sender:
+            await asyncio.to_thread(self._write_flow_samples, sender, samples)
+        for _ in samples:
+            self._flow_samples.popleft()
+
+    @staticmethod
+    def _write_flow_samples(sender, samples: List[Tuple[datetime, Dict[str, Any]]]):
+        """Buffer and send samples on the sender; blocking, run off the event loop"""
+        for timestamp, columns in samples:
+            sender.row(
+                'data_flow_metrics',
+                symbols={'metric_type': 'event_count'},
+                columns=columns,
+                at=timestamp
+            )
+        sender.flush()
+
 # Create global service instance
 data_flow_service = DataFlowService() 
\ No newline at end of file
@@ -1,9 +1,10 @@
 """
 Data source service implementation.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 import logging
+import asyncpg
 from fastapi import HTTPException, status
 
 from ..models.data_source import (
@@ -17,23 +18,82 @@ from .data_source_validator import data_source_validator
 
 logger = logging.getLogger(__name__)
 
+# Columns returned by list views; config is only loaded for single sources
+_LIST_COLUMNS = """
+    ds.id, ds.name, ds.description, ds.type, ds.tags, ds.status,
+    ds.health, ds.organization_id, ds.created_at, ds.updated_at
+"""
+
+# Data source lookup restricted to the user's organizations; shared by all
+# single-source operations so each connection prepares it only once
+_SQL_GET_SOURCE = """
+    SELECT ds.*
+    FROM data_sources ds
+    JOIN organization_members om ON ds.organization_id = om.organization_id
+    WHERE ds.id = $1 AND om.user_id = $2
+"""
+_SQL_GET_SOURCE_FOR_UPDATE = _SQL_GET_SOURCE + "FOR UPDATE OF ds\n"
+
+# No unique index backs data source names, so creates of the same name in
+# an organization are serialized on a transaction-scoped advisory lock
+_SQL_LOCK_SOURCE_NAME = """
+    SELECT pg_advisory_xact_lock(hashtextextended($1::text || ':' || $2, 0))
+"""
+
+async def _fetch_source_with_access(
+    conn,
+    source_id: int,
+    user_id: int,
+    for_update: bool = False
+) -> Optional[asyncpg.Record]:
+    """Fetch a data source if the user belongs to its organization."""
+    return await conn.fetchrow(
+        _SQL_GET_SOURCE_FOR_UPDATE if for_update else _SQL_GET_SOURCE,
+        source_id,
+        user_id
+    )
+
 class DataSourceService:
-    """Service for managing data sources."""
+    """Service for managing data sources.
+    
+    Rows are returned as asyncpg Records, which support mapping access;
+    callers convert them with dict() only when serializing.
+    """
     
-    async def list_data_sources(self, user_id: int) -> List[Dict[str, Any]]:
-        """List all data sources for user's organizations."""
+    async def list_data_sources(
+        self,
+        user_id: int,
+        limit: int = 50,
+        cursor: Optional[Tuple[datetime, int]] = None
+    ) -> List[asyncpg.Record]:
+        """List data sources for user's organizations, newest first.
+        
+        Pass the (created_at, id) of the last row of a page as cursor to get
+        the next page.
+        """
         try:
             async with db_pool.postgres_connection() as conn:
-                # Get user's organization memberships
-                sources = await conn.fetch("""
-                    SELECT ds.* 
-                    FROM data_sources ds
-                    JOIN organization_members om ON ds.organization_id = om.organization_id
-                    WHERE om.user_id = $1
-                    ORDER BY ds.created_at DESC
-                """, user_id)
+                if cursor is None:
+                    sources = await conn.fetch(f"""
+                        SELECT {_LIST_COLUMNS}
+                        FROM data_sources ds
+                        JOIN organization_members om ON ds.organization_id = om.organization_id
+                        WHERE om.user_id = $1
+                        ORDER BY ds.created_at DESC, ds.id DESC
+                        LIMIT $2
+                    """, user_id, limit)
+                else:
+                    sources = await conn.fetch(f"""
+                        SELECT {_LIST_COLUMNS}
+                        FROM data_sources ds
+                        JOIN organization_members om ON ds.organization_id = om.organization_id
+                        WHERE om.user_id = $1
+                        AND (ds.created_at, ds.id) < ($2, $3)
+                        ORDER BY ds.created_at DESC, ds.id DESC
+                        LIMIT $4
+                    """, user_id, cursor[0], cursor[1], limit)
                 
-                return [dict(source) for source in sources]
+                return sources
                 
         except DatabaseError as e:
             logger.error(f"Database error in list_data_sources: {str(e)}")
@@ -47,56 +107,65 @@ class DataSourceService:
         self,
         source: DataSourceCreate,
         user_id: int
-    ) -> Dict[str, Any]:
+    ) -> asyncpg.Record:
         """Create a new data source."""
         try:
-            async with db_pool.postgres_connection() as conn:
-                # Start transaction
-                async with conn.transaction():
-                    # Verify user has access to organization
-                    org_access = await conn.fetchrow("""
+            async with db_pool.postgres_connection() as conn, conn.transaction():
+                # Taken before the insert, so its NOT EXISTS check sees a
+                # concurrent create of the same name once that commits
+                await conn.execute(
+                    _SQL_LOCK_SOURCE_NAME, source.organization_id, source.name
+                )
+                
+                # Access check, name uniqueness check and insert in one statement
+                created = await conn.fetchrow("""
+                    INSERT INTO data_sources (
+                        name, description, type, config, tags,
+                        organization_id, status, health
+                    )
+                    SELECT $1, $2, $3, $4, $5, $6, $7, $8
+                    WHERE EXISTS (
+                        SELECT 1 FROM organization_members
+                        WHERE organization_id = $6 AND user_id = $9
+                    )
+                    AND NOT EXISTS (
+                        SELECT 1 FROM data_sources
+                        WHERE organization_id = $6 AND name = $1
+                    )
+                    RETURNING *
+                """,
+                source.name,
+                source.description,
+                source.type.value,
+                source.config.model_dump(),
+                source.tags,
+                source.organization_id,
+                DataSourceStatus.INACTIVE.value,
+                DataSourceHealth.UNKNOWN.value,
+                user_id
+                )
+                
+                if created:
+                    return created
+                
+                # Nothing inserted; find out which check failed
+                has_access = await conn.fetchval("""
+                    SELECT EXISTS (
                         SELECT 1 FROM organization_members
                         WHERE organization_id = $1 AND user_id = $2
-                    """, source.organization_id, user_id)
-                    
-                    if not org_access:
-                        raise HTTPException(
-                            status_code=status.HTTP_403_FORBIDDEN,
-                            detail="User does not have access to this organization"
-                        )
-                    
-                    # Check if name exists in organization
-                    existing = await conn.fetchrow("""
-                        SELECT id FROM data_sources
-                        WHERE organization_id = $1 AND name = $2
-                    """, source.organization_id, source.name)
-                    
-                    if existing:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Data source with this name already exists"
-                        )
-                    
-                    # Create data source
-                    created = await conn.fetchrow("""
-                        INSERT INTO data_sources (
-                            name, description, type, config, tags,
-                            organization_id, status, health
-                        )
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                        RETURNING *
-                    """,
-                    source.name,
-                    source.description,
-                    source.type.value,
-                    source.config.dict(),
-                    source.tags,
-                    source.organization_id,
-                    DataSourceStatus.INACTIVE.value,
-                    DataSourceHealth.UNKNOWN.value
                     )
-                    
-                    return dict(created)
+                """, source.organization_id, user_id)
+                
+                if not has_access:
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="User does not have access to this organization"
+                    )
+                
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Data source with this name already exists"
+                )
                     
         except DatabaseError as e:
             logger.error(f"Database error in create_data_source: {str(e)}")
@@ -110,17 +179,12 @@ class DataSourceService:
         self,
         source_id: int,
         user_id: int
-    ) -> Dict[str, Any]:
+    ) -> asyncpg.Record:
         """Get a specific data source."""
         try:
             async with db_pool.postgres_connection() as conn:
                 # Get data source with access check
-                source = await conn.fetchrow("""
-                    SELECT ds.* 
-                    FROM data_sources ds
-                    JOIN organization_members om ON ds.organization_id = om.organization_id
-                    WHERE ds.id = $1 AND om.user_id = $2
-                """, source_id, user_id)
+                source = await _fetch_source_with_access(conn, source_id, user_id)
                 
                 if not source:
                     raise HTTPException(
@@ -128,7 +192,7 @@ class DataSourceService:
                         detail="Data source not found"
                     )
                 
-                return dict(source)
+                return source
                 
         except DatabaseError as e:
             logger.error(f"Database error in get_data_source: {str(e)}")
@@ -143,86 +207,93 @@ class DataSourceService:
         source_id: int,
         source_update: DataSourceUpdate,
         user_id: int
-    ) -> Dict[str, Any]:
+    ) -> asyncpg.Record:
         """Update a data source."""
         try:
             async with db_pool.postgres_connection() as conn:
-                # Start transaction
-                async with conn.transaction():
-                    # Get current data source with access check
-                    current = await conn.fetchrow("""
-                        SELECT ds.* 
-                        FROM data_sources ds
-                        JOIN organization_members om ON ds.organization_id = om.organization_id
-                        WHERE ds.id = $1 AND om.user_id = $2
-                        FOR UPDATE
-                    """, source_id, user_id)
+                # Build update query dynamically
+                updates = []
+                values = [source_id, user_id]
+                update_idx = 3
+                name_check = ""
+                
+                if source_update.name is not None:
+                    # Enforce name uniqueness in organization within the update
+                    name_check = f"""
+                        AND NOT EXISTS (
+                            SELECT 1 FROM data_sources other
+                            WHERE other.organization_id = ds.organization_id
+                            AND other.name = ${update_idx}
+                            AND other.id != ds.id
+                        )"""
+                    updates.append(f"name = ${update_idx}")
+                    values.append(source_update.name)
+                    update_idx += 1
+                
+                if source_update.description is not None:
+                    updates.append(f"description = ${update_idx}")
+                    values.append(source_update.description)
+                    update_idx += 1
+                
+                if source_update.type is not None:
+                    updates.append(f"type = ${update_idx}")
+                    values.append(source_update.type.value)
+                    update_idx += 1
+                
+                if source_update.config is not None:
+                    updates.append(f"config = ${update_idx}")
+                    values.append(source_update.config.model_dump())
+                    update_idx += 1
+                
+                if source_update.tags is not None:
+                    updates.append(f"tags = ${update_idx}")
+                    values.append(source_update.tags)
+                    update_idx += 1
+                
+                if source_update.status is not None:
+                    updates.append(f"status = ${update_idx}")
+                    values.append(source_update.status.value)
+                    update_idx += 1
+                
+                if not updates:
+                    # Nothing to change; return the current data source
+                    current = await _fetch_source_with_access(conn, source_id, user_id)
                     
                     if not current:
                         raise HTTPException(
                             status_code=status.HTTP_404_NOT_FOUND,
                             detail="Data source not found"
                         )
-                    
-                    # Build update query dynamically
-                    updates = []
-                    values = [source_id]
-                    update_idx = 2
-                    
-                    if source_update.name is not None:
-                        # Check name uniqueness in organization
-                        name_exists = await conn.fetchrow("""
-                            SELECT 1 FROM data_sources
-                            WHERE organization_id = $1 AND name = $2 AND id != $3
-                        """, current["organization_id"], source_update.name, source_id)
-                        
-                        if name_exists:
-                            raise HTTPException(
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Data source with this name already exists"
-                            )
-                        updates.append(f"name = ${update_idx}")
-                        values.append(source_update.name)
-                        update_idx += 1
-                    
-                    if source_update.description is not None:
-                        updates.append(f"description = ${update_idx}")
-                        values.append(source_update.description)
-                        update_idx += 1
-                    
-                    if source_update.type is not None:
-                        updates.append(f"type = ${update_idx}")
-                        values.append(source_update.type.value)
-                        update_idx += 1
-                    
-                    if source_update.config is not None:
-                        updates.append(f"config = ${update_idx}")
-                        values.append(source_update.config.dict())
-                        update_idx += 1
-                    
-                    if source_update.tags is not None:
-                        updates.append(f"tags = ${update_idx}")
-                        values.append(source_update.tags)
-                        update_idx += 1
-                    
-                    if source_update.status is not None:
-                        updates.append(f"status = ${update_idx}")
-                        values.append(source_update.status.value)
-                        update_idx += 1
-                    
-                    if updates:
-                        # Perform update
-                        updated = await conn.fetchrow(f"""
-                            UPDATE data_sources
-                            SET {", ".join(updates)},
-                                updated_at = CURRENT_TIMESTAMP
-                            WHERE id = $1
-                            RETURNING *
-                        """, *values)
-                        
-                        return dict(updated)
-                    
-                    return dict(current)
+                    return current
+                
+                # Access check, name check and update in one statement
+                updated = await conn.fetchrow(f"""
+                    UPDATE data_sources ds
+                    SET {", ".join(updates)},
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM organization_members om
+                    WHERE ds.id = $1
+                    AND om.organization_id = ds.organization_id
+                    AND om.user_id = $2{name_check}
+                    RETURNING ds.*
+                """, *values)
+                
+                if updated:
+                    return updated
+                
+                # Nothing updated; find out whether the source is visible at all
+                visible = await _fetch_source_with_access(conn, source_id, user_id)
+                
+                if not visible:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Data source not found"
+                    )
+                
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Data source with this name already exists"
+                )
                     
         except DatabaseError as e:
             logger.error(f"Database error in update_data_source: {str(e)}")
@@ -239,13 +310,7 @@ class DataSourceService:
                 # Start transaction
                 async with conn.transaction():
                     # Get data source with access check
-                    source = await conn.fetchrow("""
-                        SELECT ds.* 
-                        FROM data_sources ds
-                        JOIN organization_members om ON ds.organization_id = om.organization_id
-                        WHERE ds.id = $1 AND om.user_id = $2
-                        FOR UPDATE
-                    """, source_id, user_id)
+                    source = await _fetch_source_with_access(conn, source_id, user_id, for_update=True)
                     
                     if not source:
                         raise HTTPException(
@@ -282,12 +347,7 @@ class DataSourceService:
         try:
             async with db_pool.postgres_connection() as conn:
                 # Get data source with access check
-                source = await conn.fetchrow("""
-                    SELECT ds.* 
-                    FROM data_sources ds
-                    JOIN organization_members om ON ds.organization_id = om.organization_id
-                    WHERE ds.id = $1 AND om.user_id = $2
-                """, source_id, user_id)
+                source = await _fetch_source_with_access(conn, source_id, user_id)
                 
                 if not source:
                     raise HTTPException(
@@ -308,25 +368,23 @@ class DataSourceService:
                     source["config"]
                 )
                 
-                # Update status based on validation result
-                await conn.execute("""
-                    UPDATE data_sources
-                    SET status = $1,
-                        health = $2,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = $3
-                """,
-                validation_result.status.value,
-                validation_result.health.value,
-                source_id
-                )
-                
-                # Log validation event
+                # Store the result and log the validation event in one statement
                 await conn.execute("""
+                    WITH updated AS (
+                        UPDATE data_sources
+                        SET status = $1,
+                            health = $2,
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE id = $3
+                        RETURNING id
+                    )
                     INSERT INTO data_source_logs (
                         data_source_id, level, message, details
-                    ) VALUES ($1, $2, $3, $4)
+                    )
+                    SELECT id, $4, $5, $6 FROM updated
                 """,
+                validation_result.status.value,
+                validation_result.health.value,
                 source_id,
                 "INFO" if validation_result.is_valid else "ERROR",
                 f"Connection validation {'succeeded' if validation_result.is_valid else 'failed'}",
@@ -355,12 +413,7 @@ class DataSourceService:
         try:
             async with db_pool.postgres_connection() as conn:
                 # Get data source with access check
-                source = await conn.fetchrow("""
-                    SELECT ds.* 
-                    FROM data_sources ds
-                    JOIN organization_members om ON ds.organization_id = om.organization_id
-                    WHERE ds.id = $1 AND om.user_id = $2
-                """, source_id, user_id)
+                source = await _fetch_source_with_access(conn, source_id, user_id)
                 
                 if not source:
                     raise HTTPException(
@@ -383,7 +436,7 @@ class DataSourceService:
                         detail="No metrics found for data source"
                     )
                 
-                return DataSourceMetrics(**dict(metrics_data))
+                return DataSourceMetrics(**metrics_data)
                 
         except DatabaseError as e:
             logger.error(f"Database error in get_metrics: {str(e)}")
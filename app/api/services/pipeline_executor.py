@@ -3,10 +3,16 @@ Pipeline executor service for handling pipeline execution.
 """
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, AsyncIterator, Awaitable, Callable
 from datetime import datetime, timezone
+import orjson
+import redis.asyncio as redis
 from fastapi import HTTPException, status
 
+from ..core.config.settings import settings
 from ..core.database import db_pool, DatabaseError
 from ..models.pipeline import (
     Pipeline, PipelineStatus, PipelineHealth,
@@ -15,16 +21,241 @@ from ..models.pipeline import (
 
 logger = logging.getLogger(__name__)
 
+# Statement texts are fixed, so asyncpg's per-connection statement cache
+# (sized by POSTGRES_STATEMENT_CACHE_SIZE) prepares each once per connection
+_SQL_PIPELINE_RUN_STATUS = """
+    SELECT status
+    FROM pipelines
+    WHERE id = $1
+"""
+
+# Marks a pipeline running and returns its definition in one round-trip.
+# A pipeline already running is left alone, so when several workers take
+# starts of the same pipeline only one of them runs it
+_SQL_START_PIPELINE = """
+    UPDATE pipelines
+    SET status = $2,
+        health = $3,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = $1 AND status IS DISTINCT FROM $2
+    RETURNING id, name, type, config, schedule
+"""
+
+# Takes over a run still marked running by a worker that died
+_SQL_RESUME_PIPELINE = """
+    UPDATE pipelines
+    SET status = $2,
+        health = $3,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = $1 AND status = $2
+    RETURNING id, name, type, config, schedule
+"""
+
+_SQL_FETCH_STATUS = """
+    SELECT status, health, last_run
+    FROM pipelines
+    WHERE id = $1
+"""
+
+_SQL_UPDATE_STATUS = """
+    UPDATE pipelines
+    SET status = $2,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = $1
+"""
+
+# Marks stopped a run still marked running by a worker that died
+_SQL_RELEASE_PIPELINE = """
+    UPDATE pipelines
+    SET status = $3,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = $1 AND status = $2
+"""
+
+# Enum values passed to the database as plain strings, so statement
+# parameters skip the str-subclass enum members on every write
+_RUNNING = PipelineStatus.RUNNING.value
+_STOPPED = PipelineStatus.STOPPED.value
+_FAILED = PipelineStatus.FAILED.value
+_COMPLETED = PipelineStatus.COMPLETED.value
+_HEALTHY = PipelineHealth.HEALTHY.value
+_UNHEALTHY = PipelineHealth.UNHEALTHY.value
+_ERROR = LogLevel.ERROR.value
+
+# Redis streams of start and stop requests for pipeline workers; starts
+# are consumed by one worker each, stops are read by every worker
+PIPELINE_START_STREAM = "pipeline.start"
+PIPELINE_STOP_STREAM = "pipeline.stop"
+# Approximate length the streams are trimmed to on every request
+_STREAM_MAXLEN = 10_000
+
+# Seconds a status row read by get_pipeline_status is served from Redis;
+# entries are also deleted on every status transition
+_STATUS_CACHE_TTL = 3
+
+# Seconds stop_pipeline waits for a run to wind down before cancelling it
+_STOP_TIMEOUT = 30.0
+
+# Seconds between metrics updates from a streaming pipeline
+_METRICS_UPDATE_INTERVAL = 0.1
+
+# Pipeline log entries are queued and written in batches with COPY
+_LOG_COLUMNS = ('pipeline_id', 'level', 'message', 'details', 'timestamp')
+_LOG_QUEUE_SIZE = 10_000
+_LOG_BATCH_SIZE = 500
+_LOG_FLUSH_INTERVAL = 0.1  # seconds
+
+# Final metrics of finished runs are queued and written the same way, so
+# runs finishing close together share one COPY
+_METRICS_COLUMNS = (
+    'pipeline_id', 'timestamp', 'throughput', 'latency', 'error_rate',
+    'success_rate', 'processed_records', 'failed_records'
+)
+
+# Queued by shutdown after the last row; a flusher writes its batch and
+# returns when it reads it
+_FLUSH_STOP = object()
+
+# Status transitions are written together with their log entry, one
+# round-trip each. The log row is selected from the updated row, so none
+# is written for a deleted pipeline; parameters in the select list take
+# their types from the target columns
+_SQL_UPDATE_STATUS_AND_LOG = """
+    WITH updated AS (
+        UPDATE pipelines
+        SET status = $2,
+            health = $3,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = $1
+        RETURNING id
+    )
+    INSERT INTO pipeline_logs (
+        pipeline_id, level, message, details
+    )
+    SELECT id, $4, $5, $6 FROM updated
+"""
+
+_SQL_UPDATE_STATUS_AND_HEALTH = """
+    UPDATE pipelines
+    SET status = $2,
+        health = $3,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = $1
+"""
+
+@dataclass(slots=True)
+class _RunState:
+    """Execution task and live metrics of a running pipeline.
+    
+    Counters are plain attributes updated in place; rates are derived from
+    them and a PipelineMetrics model is built only when metrics are reported.
+    """
+    task: asyncio.Task
+    # Set by stop_pipeline; the run checks it between stages and batches
+    stop_event: asyncio.Event = field(default_factory=asyncio.Event)
+    throughput: float = 0.0
+    latency: float = 0.0
+    processed_records: int = 0
+    failed_records: int = 0
+
+    @property
+    def success_rate(self) -> float:
+        """Processed records as a percentage of all records."""
+        total = self.processed_records + self.failed_records
+        return (self.processed_records / total) * 100 if total else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        """Failed records as a percentage of all records."""
+        total = self.processed_records + self.failed_records
+        return (self.failed_records / total) * 100 if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Current metrics as a plain dict, e.g. for JSON log details."""
+        return {
+            "throughput": self.throughput,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "success_rate": self.success_rate,
+            "processed_records": self.processed_records,
+            "failed_records": self.failed_records
+        }
+
+    def metrics(self) -> PipelineMetrics:
+        """Current metrics as a PipelineMetrics model."""
+        return PipelineMetrics(**self.as_dict())
+
+async def _no_batches() -> AsyncIterator[Any]:
+    """Placeholder stream that ends without yielding any batch."""
+    return
+    yield
+
 class PipelineExecutor:
     """Service for executing data pipelines."""
 
     def __init__(self):
         """Initialize pipeline executor."""
-        self._running_pipelines: Dict[int, asyncio.Task] = {}
-        self._pipeline_metrics: Dict[int, PipelineMetrics] = {}
+        # One entry per running pipeline, holding its task and metrics
+        self._running_pipelines: Dict[int, _RunState] = {}
+        # Pending pipeline_logs rows, written by _log_flusher_task
+        self._log_queue: asyncio.Queue = asyncio.Queue(maxsize=_LOG_QUEUE_SIZE)
+        self._log_flusher_task: Optional[asyncio.Task] = None
+        # Pending pipeline_metrics rows, written by _metrics_flusher_task
+        self._metrics_queue: asyncio.Queue = asyncio.Queue(maxsize=_LOG_QUEUE_SIZE)
+        self._metrics_flusher_task: Optional[asyncio.Task] = None
+        # Redis client of the status cache, acquired once rather than
+        # pinged on every cache read and write; dropped after an error
+        self._status_redis: Optional[redis.Redis] = None
+        # With workers enabled, start and stop are handed to worker processes
+        # and this process runs no pipelines itself
+        self._use_worker = settings.PIPELINE_WORKER_ENABLED
+        # Run handler per pipeline type; other types run as custom pipelines
+        self._handlers = MappingProxyType({
+            "etl": self._execute_etl_pipeline,
+            "streaming": self._execute_streaming_pipeline
+        })
 
     async def start_pipeline(self, pipeline_id: int) -> None:
-        """Start pipeline execution."""
+        """Start pipeline execution, here or on a pipeline worker."""
+        if not self._use_worker:
+            await self.run_pipeline(pipeline_id)
+            return
+        
+        try:
+            # Runs on workers are not in _running_pipelines here, so the
+            # status row decides whether the pipeline is already running
+            async with db_pool.postgres_connection() as conn:
+                run_status = await conn.fetchval(_SQL_PIPELINE_RUN_STATUS, pipeline_id)
+            if run_status is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Pipeline not found"
+                )
+            if run_status == _RUNNING:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Pipeline is already running"
+                )
+            client = await db_pool.redis_connection()
+            await client.xadd(
+                PIPELINE_START_STREAM,
+                {"id": pipeline_id},
+                maxlen=_STREAM_MAXLEN,
+                approximate=True
+            )
+        except DatabaseError as e:
+            logger.error(f"Error queueing start of pipeline {pipeline_id}: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+
+    async def run_pipeline(self, pipeline_id: int, resume: bool = False) -> None:
+        """Run a pipeline in this process.
+
+        With resume, the pipeline must still be marked running, as a run
+        left by a worker that died is; otherwise it must not be.
+        """
         if pipeline_id in self._running_pipelines:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -32,42 +263,50 @@ class PipelineExecutor:
             )
 
         try:
+            # Mark the pipeline running and fetch its definition; the start
+            # log entry is queued rather than written here
             async with db_pool.postgres_connection() as conn:
-                pipeline = await conn.fetchrow("""
-                    SELECT id, name, type, config, schedule
-                    FROM pipelines
-                    WHERE id = $1
-                """, pipeline_id)
-
+                pipeline = await conn.fetchrow(
+                    _SQL_RESUME_PIPELINE if resume else _SQL_START_PIPELINE,
+                    pipeline_id,
+                    _RUNNING,
+                    _HEALTHY
+                )
                 if not pipeline:
+                    run_status = await conn.fetchval(_SQL_PIPELINE_RUN_STATUS, pipeline_id)
+
+            if not pipeline:
+                if run_status is None:
                     raise HTTPException(
                         status_code=status.HTTP_404_NOT_FOUND,
                         detail="Pipeline not found"
                     )
-
-                # Initialize metrics
-                self._pipeline_metrics[pipeline_id] = PipelineMetrics(
-                    throughput=0.0,
-                    latency=0.0,
-                    error_rate=0.0,
-                    success_rate=0.0,
-                    processed_records=0,
-                    failed_records=0
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Pipeline is not running" if resume else "Pipeline is already running"
                 )
+            await self.invalidate_status(pipeline_id)
 
-                # Start pipeline execution task
-                task = asyncio.create_task(
-                    self._execute_pipeline(pipeline_id, dict(pipeline))
-                )
-                self._running_pipelines[pipeline_id] = task
+            await self._log_pipeline_event(
+                pipeline_id,
+                LogLevel.INFO,
+                f"Pipeline {pipeline['name']} started",
+                {"type": pipeline["type"]}
+            )
 
-                # Log pipeline start
-                await self._log_pipeline_event(
+            # Start pipeline execution task; it gets only the fields it
+            # reads, not a dict copy of the whole row
+            stop_event = asyncio.Event()
+            task = asyncio.create_task(
+                self._execute_pipeline(
                     pipeline_id,
-                    LogLevel.INFO,
-                    f"Pipeline {pipeline['name']} started",
-                    {"type": pipeline["type"]}
-                )
+                    pipeline["type"],
+                    pipeline["config"],
+                    stop_event
+                ),
+                name=f"pipeline-{pipeline_id}"
+            )
+            self._running_pipelines[pipeline_id] = _RunState(task, stop_event)
 
         except DatabaseError as e:
             logger.error(f"Database error starting pipeline {pipeline_id}: {str(e)}")
@@ -77,7 +316,28 @@ class PipelineExecutor:
             )
 
     async def stop_pipeline(self, pipeline_id: int) -> None:
-        """Stop pipeline execution."""
+        """Stop pipeline execution, here or on the worker running it."""
+        if not self._use_worker:
+            await self.halt_pipeline(pipeline_id)
+            return
+        
+        try:
+            client = await db_pool.redis_connection()
+            await client.xadd(
+                PIPELINE_STOP_STREAM,
+                {"id": pipeline_id},
+                maxlen=_STREAM_MAXLEN,
+                approximate=True
+            )
+        except DatabaseError as e:
+            logger.error(f"Error queueing stop of pipeline {pipeline_id}: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+
+    async def halt_pipeline(self, pipeline_id: int) -> None:
+        """Stop a pipeline running in this process."""
         if pipeline_id not in self._running_pipelines:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -85,34 +345,38 @@ class PipelineExecutor:
             )
 
         try:
-            # Cancel the pipeline task
-            task = self._running_pipelines[pipeline_id]
-            task.cancel()
+            # Ask the run to stop after its current stage or batch, so
+            # in-flight writes and its final metrics are kept; it is only
+            # cancelled if it does not finish in time. The state is held
+            # here because the task removes its entry when it ends
+            state = self._running_pipelines[pipeline_id]
+            state.stop_event.set()
+            cancelled = False
             try:
-                await task
+                await asyncio.wait_for(state.task, timeout=_STOP_TIMEOUT)
+            except TimeoutError:
+                logger.error(f"Pipeline {pipeline_id} did not stop within {_STOP_TIMEOUT}s, cancelled")
+                cancelled = True
             except asyncio.CancelledError:
-                pass
+                cancelled = True
 
-            # Update pipeline status
-            async with db_pool.postgres_connection() as conn:
-                await conn.execute("""
-                    UPDATE pipelines
-                    SET status = $2,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = $1
-                """, pipeline_id, PipelineStatus.STOPPED)
-
-                # Log pipeline stop
-                await self._log_pipeline_event(
-                    pipeline_id,
-                    LogLevel.INFO,
-                    "Pipeline stopped",
-                    {"final_metrics": self._pipeline_metrics[pipeline_id].dict()}
-                )
+            # A run that stopped on its own has already recorded its
+            # status; a cancelled one has not
+            if cancelled:
+                async with db_pool.postgres_connection() as conn:
+                    await conn.execute(_SQL_UPDATE_STATUS, pipeline_id, _STOPPED)
+                await self.invalidate_status(pipeline_id)
+
+            # Log pipeline stop
+            await self._log_pipeline_event(
+                pipeline_id,
+                LogLevel.INFO,
+                "Pipeline stopped",
+                {"final_metrics": state.as_dict()}
+            )
 
             # Cleanup
-            del self._running_pipelines[pipeline_id]
-            del self._pipeline_metrics[pipeline_id]
+            self._running_pipelines.pop(pipeline_id, None)
 
         except DatabaseError as e:
             logger.error(f"Database error stopping pipeline {pipeline_id}: {str(e)}")
@@ -121,29 +385,46 @@ class PipelineExecutor:
                 detail="Database error occurred"
             )
 
+    async def release_pipeline(self, pipeline_id: int) -> None:
+        """Mark stopped a run left by a worker that died, if still marked running."""
+        try:
+            async with db_pool.postgres_connection() as conn:
+                await conn.execute(_SQL_RELEASE_PIPELINE, pipeline_id, _RUNNING, _STOPPED)
+            await self.invalidate_status(pipeline_id)
+        except DatabaseError as e:
+            logger.error(f"Database error releasing pipeline {pipeline_id}: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+
     async def get_pipeline_status(self, pipeline_id: int) -> Dict[str, Any]:
         """Get pipeline execution status."""
+        state = self._running_pipelines.get(pipeline_id)
         try:
-            async with db_pool.postgres_connection() as conn:
-                status = await conn.fetchrow("""
-                    SELECT status, health, last_run
-                    FROM pipelines
-                    WHERE id = $1
-                """, pipeline_id)
+            row = await self._get_cached_status(pipeline_id)
+            if row is None:
+                async with db_pool.postgres_connection() as conn:
+                    row = await conn.fetchrow(_SQL_FETCH_STATUS, pipeline_id)
 
-                if not status:
+                if not row:
                     raise HTTPException(
                         status_code=status.HTTP_404_NOT_FOUND,
                         detail="Pipeline not found"
                     )
+                await self._cache_status(pipeline_id, row)
 
-                return {
-                    "status": status["status"],
-                    "health": status["health"],
-                    "is_running": pipeline_id in self._running_pipelines,
-                    "metrics": self._pipeline_metrics.get(pipeline_id),
-                    "last_run": status["last_run"]
-                }
+            # Runs on workers are only visible through their status
+            is_running = state is not None or (
+                self._use_worker and row["status"] == PipelineStatus.RUNNING
+            )
+            return {
+                "status": row["status"],
+                "health": row["health"],
+                "is_running": is_running,
+                "metrics": state.metrics() if state is not None else None,
+                "last_run": row["last_run"]
+            }
 
         except DatabaseError as e:
             logger.error(f"Database error getting pipeline status: {str(e)}")
@@ -152,65 +433,85 @@ class PipelineExecutor:
                 detail="Database error occurred"
             )
 
-    async def _execute_pipeline(self, pipeline_id: int, pipeline: Dict[str, Any]) -> None:
-        """Execute pipeline logic."""
+    async def _get_cached_status(self, pipeline_id: int) -> Optional[Dict[str, Any]]:
+        """Status row cached by get_pipeline_status, or None on a miss.
+        
+        Redis errors count as a miss, so status reads fall back to PostgreSQL.
+        """
         try:
-            # Initialize execution
-            start_time = datetime.now(timezone.utc)
-            processed_records = 0
-            failed_records = 0
+            client = await self._status_cache()
+            cached = await client.get(f"pipe:status:{pipeline_id}")
+        except Exception as e:
+            logger.warning(f"Error reading cached status of pipeline {pipeline_id}: {str(e)}")
+            self._status_redis = None
+            return None
+        if cached is None:
+            return None
+        
+        row = orjson.loads(cached)
+        if row["last_run"] is not None:
+            row["last_run"] = datetime.fromisoformat(row["last_run"])
+        return row
 
-            # Get source and destination connections
-            source_config = pipeline["config"]["source_config"]
-            dest_config = pipeline["config"]["destination_config"]
+    async def _cache_status(self, pipeline_id: int, row: Any) -> None:
+        """Cache a status row for _STATUS_CACHE_TTL seconds."""
+        try:
+            client = await self._status_cache()
+            await client.set(
+                f"pipe:status:{pipeline_id}",
+                orjson.dumps(dict(row)),
+                ex=_STATUS_CACHE_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Error caching status of pipeline {pipeline_id}: {str(e)}")
+            self._status_redis = None
 
-            async with db_pool.postgres_connection() as conn:
-                # Update pipeline status to running
-                await conn.execute("""
-                    UPDATE pipelines
-                    SET status = $2,
-                        health = $3,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = $1
-                """, pipeline_id, PipelineStatus.RUNNING, PipelineHealth.HEALTHY)
-
-                # Execute pipeline based on type
-                if pipeline["type"] == "etl":
-                    await self._execute_etl_pipeline(
-                        pipeline_id, source_config, dest_config
-                    )
-                elif pipeline["type"] == "streaming":
-                    await self._execute_streaming_pipeline(
-                        pipeline_id, source_config, dest_config
-                    )
-                else:
-                    await self._execute_custom_pipeline(
-                        pipeline_id, pipeline["config"]
-                    )
+    async def invalidate_status(self, pipeline_id: int) -> None:
+        """Drop the cached status row after a status transition."""
+        try:
+            client = await self._status_cache()
+            await client.delete(f"pipe:status:{pipeline_id}")
+        except Exception as e:
+            logger.warning(f"Error invalidating status of pipeline {pipeline_id}: {str(e)}")
+            self._status_redis = None
 
-                # Update final status
-                end_time = datetime.now(timezone.utc)
-                duration = (end_time - start_time).total_seconds()
-                
-                metrics = self._pipeline_metrics[pipeline_id]
-                await conn.execute("""
-                    UPDATE pipelines
-                    SET status = $2,
-                        health = $3,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = $1
-                """, pipeline_id, PipelineStatus.COMPLETED, PipelineHealth.HEALTHY)
-
-                # Store final metrics
-                await conn.execute("""
-                    INSERT INTO pipeline_metrics (
-                        pipeline_id, timestamp, throughput, latency,
-                        error_rate, success_rate, processed_records,
-                        failed_records
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                """, pipeline_id, end_time, metrics.throughput,
-                     metrics.latency, metrics.error_rate, metrics.success_rate,
-                     metrics.processed_records, metrics.failed_records)
+    async def _status_cache(self) -> redis.Redis:
+        """Redis client of the status cache, acquired on first use."""
+        if self._status_redis is None:
+            self._status_redis = await db_pool.redis_connection()
+        return self._status_redis
+
+    async def _execute_pipeline(
+        self,
+        pipeline_id: int,
+        pipeline_type: str,
+        config: Dict[str, Any],
+        stop_event: asyncio.Event
+    ) -> None:
+        """Execute pipeline logic.
+        
+        Once stop_event is set the run ends after its current stage and is
+        recorded as stopped, with its metrics so far.
+        """
+        try:
+            # Execute pipeline based on type
+            handler = self._handlers.get(pipeline_type, self._execute_custom_pipeline)
+            await handler(pipeline_id, config, stop_event)
+
+            # Mark the pipeline completed, or stopped, and queue its final
+            # metrics for the background metrics writer
+            final_status = (
+                _STOPPED if stop_event.is_set() else _COMPLETED
+            )
+            async with db_pool.postgres_connection() as conn:
+                await conn.execute(
+                    _SQL_UPDATE_STATUS_AND_HEALTH,
+                    pipeline_id,
+                    final_status,
+                    _HEALTHY
+                )
+            await self.invalidate_status(pipeline_id)
+            self._queue_final_metrics(pipeline_id, self._running_pipelines[pipeline_id])
 
         except asyncio.CancelledError:
             # Pipeline was stopped
@@ -220,43 +521,43 @@ class PipelineExecutor:
             logger.error(f"Error executing pipeline {pipeline_id}: {str(e)}")
             try:
                 async with db_pool.postgres_connection() as conn:
-                    await conn.execute("""
-                        UPDATE pipelines
-                        SET status = $2,
-                            health = $3,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE id = $1
-                    """, pipeline_id, PipelineStatus.FAILED, PipelineHealth.UNHEALTHY)
-
-                    await self._log_pipeline_event(
+                    await conn.execute(
+                        _SQL_UPDATE_STATUS_AND_LOG,
                         pipeline_id,
-                        LogLevel.ERROR,
+                        _FAILED,
+                        _UNHEALTHY,
+                        _ERROR,
                         f"Pipeline execution failed: {str(e)}",
                         {"error": str(e)}
                     )
+                await self.invalidate_status(pipeline_id)
             except Exception as log_error:
                 logger.error(f"Error logging pipeline failure: {str(log_error)}")
 
         finally:
             # Cleanup
-            if pipeline_id in self._running_pipelines:
-                del self._running_pipelines[pipeline_id]
-            if pipeline_id in self._pipeline_metrics:
-                del self._pipeline_metrics[pipeline_id]
+            self._running_pipelines.pop(pipeline_id, None)
 
     async def _execute_etl_pipeline(
         self,
         pipeline_id: int,
-        source_config: Dict[str, Any],
-        dest_config: Dict[str, Any]
+        config: Dict[str, Any],
+        stop_event: asyncio.Event
     ) -> None:
-        """Execute ETL pipeline."""
+        """Execute ETL pipeline, stopping between stages once stop_event is set."""
         try:
+            source_config = config["source_config"]
+            dest_config = config["destination_config"]
+            
             # Extract data from source
             data = await self._extract_data(pipeline_id, source_config)
+            if stop_event.is_set():
+                return
             
             # Transform data
             transformed_data = await self._transform_data(pipeline_id, data)
+            if stop_event.is_set():
+                return
             
             # Load data to destination
             await self._load_data(pipeline_id, transformed_data, dest_config)
@@ -268,34 +569,49 @@ class PipelineExecutor:
     async def _execute_streaming_pipeline(
         self,
         pipeline_id: int,
-        source_config: Dict[str, Any],
-        dest_config: Dict[str, Any]
+        config: Dict[str, Any],
+        stop_event: asyncio.Event
     ) -> None:
-        """Execute streaming pipeline."""
+        """Execute streaming pipeline until the stream ends or stop_event is set."""
+        loop = asyncio.get_running_loop()
+        # Records processed since metrics were last updated
+        processed = 0
+        next_update = loop.time() + _METRICS_UPDATE_INTERVAL
         try:
+            dest_config = config["destination_config"]
+            
             # Initialize streaming connection
-            async with self._get_streaming_connection(source_config) as stream:
-                while True:
-                    # Process stream data
-                    data = await stream.get_data()
-                    if not data:
-                        continue
-                    
+            async with self._get_streaming_connection(config["source_config"]) as stream:
+                # Each iteration waits for the next batch, so an idle
+                # stream does not spin the event loop
+                async for data in stream:
                     # Transform and load data
                     transformed_data = await self._transform_data(pipeline_id, data)
                     await self._load_data(pipeline_id, transformed_data, dest_config)
                     
-                    # Update metrics
-                    await self._update_metrics(pipeline_id, len(data), 0)
+                    # Update metrics once per interval, not per batch
+                    processed += len(data)
+                    if loop.time() >= next_update:
+                        await self._update_metrics(pipeline_id, processed, 0)
+                        processed = 0
+                        next_update = loop.time() + _METRICS_UPDATE_INTERVAL
+                    
+                    if stop_event.is_set():
+                        break
                     
         except Exception as e:
             logger.error(f"Error in streaming pipeline {pipeline_id}: {str(e)}")
             raise
+        finally:
+            # Count records processed since the last update
+            if processed:
+                await self._update_metrics(pipeline_id, processed, 0)
 
     async def _execute_custom_pipeline(
         self,
         pipeline_id: int,
-        config: Dict[str, Any]
+        config: Dict[str, Any],
+        stop_event: asyncio.Event
     ) -> None:
         """Execute custom pipeline."""
         try:
@@ -339,13 +655,18 @@ class PipelineExecutor:
         # Implement data loading logic
         pass
 
+    @asynccontextmanager
     async def _get_streaming_connection(
         self,
         config: Dict[str, Any]
-    ) -> Any:
-        """Get streaming connection."""
+    ) -> AsyncIterator[AsyncIterator[Any]]:
+        """Get streaming connection.
+        
+        Yields an async iterator of data batches that waits until a batch
+        is available, rather than returning empty ones to poll.
+        """
         # Implement streaming connection logic
-        pass
+        yield _no_batches()
 
     async def _execute_custom_logic(
         self,
@@ -362,16 +683,10 @@ class PipelineExecutor:
         processed: int,
         failed: int
     ) -> None:
-        """Update pipeline metrics."""
-        metrics = self._pipeline_metrics[pipeline_id]
+        """Update pipeline metrics; rates are derived when reported."""
+        metrics = self._running_pipelines[pipeline_id]
         metrics.processed_records += processed
         metrics.failed_records += failed
-        
-        # Calculate rates
-        total_records = metrics.processed_records + metrics.failed_records
-        if total_records > 0:
-            metrics.success_rate = (metrics.processed_records / total_records) * 100
-            metrics.error_rate = (metrics.failed_records / total_records) * 100
 
     async def _log_pipeline_event(
         self,
@@ -380,16 +695,137 @@ class PipelineExecutor:
         message: str,
         details: Optional[Dict[str, Any]] = None
     ) -> None:
-        """Log pipeline event."""
+        """Queue a pipeline event for the background log writer."""
+        try:
+            self._log_queue.put_nowait(
+                (pipeline_id, level, message, details, datetime.now(timezone.utc))
+            )
+        except asyncio.QueueFull:
+            logger.error(f"Pipeline log queue full, dropping event for pipeline {pipeline_id}")
+            return
+        
+        if self._log_flusher_task is None:
+            self._log_flusher_task = asyncio.create_task(
+                self._flush_batches(self._log_queue, self._write_logs)
+            )
+
+    def _queue_final_metrics(self, pipeline_id: int, state: _RunState) -> None:
+        """Queue a run's final metrics for the background metrics writer."""
+        try:
+            self._metrics_queue.put_nowait((
+                pipeline_id,
+                datetime.now(timezone.utc),
+                state.throughput,
+                state.latency,
+                state.error_rate,
+                state.success_rate,
+                state.processed_records,
+                state.failed_records
+            ))
+        except asyncio.QueueFull:
+            logger.error(f"Pipeline metrics queue full, dropping metrics for pipeline {pipeline_id}")
+            return
+        
+        if self._metrics_flusher_task is None:
+            self._metrics_flusher_task = asyncio.create_task(
+                self._flush_batches(self._metrics_queue, self._write_metrics)
+            )
+
+    async def _flush_batches(
+        self,
+        queue: asyncio.Queue,
+        write: Callable[[List[tuple]], Awaitable[None]]
+    ) -> None:
+        """Write queued rows in batches until _FLUSH_STOP is read.
+        
+        A batch is written once _LOG_BATCH_SIZE rows are queued or
+        _LOG_FLUSH_INTERVAL seconds after its first row arrived. The batch
+        in progress when _FLUSH_STOP arrives is written before returning.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            row = await queue.get()
+            if row is _FLUSH_STOP:
+                return
+            batch = [row]
+            stopping = False
+            deadline = loop.time() + _LOG_FLUSH_INTERVAL
+            while len(batch) < _LOG_BATCH_SIZE:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        row = await queue.get()
+                except TimeoutError:
+                    break
+                if row is _FLUSH_STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            await write(batch)
+            if stopping:
+                return
+
+    async def _write_logs(self, batch: List[tuple]) -> None:
+        """Write log entries to pipeline_logs with one COPY."""
         try:
             async with db_pool.postgres_connection() as conn:
-                await conn.execute("""
-                    INSERT INTO pipeline_logs (
-                        pipeline_id, level, message, details
-                    ) VALUES ($1, $2, $3, $4)
-                """, pipeline_id, level, message, details)
+                await conn.copy_records_to_table(
+                    'pipeline_logs', records=batch, columns=_LOG_COLUMNS
+                )
         except Exception as e:
-            logger.error(f"Error logging pipeline event: {str(e)}")
+            logger.error(f"Error writing {len(batch)} pipeline log entries: {str(e)}")
+
+    async def _write_metrics(self, batch: List[tuple]) -> None:
+        """Write final run metrics to pipeline_metrics with one COPY."""
+        try:
+            async with db_pool.postgres_connection() as conn:
+                await conn.copy_records_to_table(
+                    'pipeline_metrics', records=batch, columns=_METRICS_COLUMNS
+                )
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} pipeline metrics rows: {str(e)}")
+
+    async def shutdown(self) -> None:
+        """Stop running pipelines, then the background log and metrics writers.
+        
+        Runs are stopped as in stop_pipeline, so they record their final
+        status and metrics; any still running after _STOP_TIMEOUT are
+        cancelled. Queued log entries and metrics, including those of the
+        stopped runs, are then written.
+        """
+        runs = list(self._running_pipelines.values())
+        if runs:
+            for state in runs:
+                state.stop_event.set()
+            _, pending = await asyncio.wait(
+                [state.task for state in runs], timeout=_STOP_TIMEOUT
+            )
+            for task in pending:
+                logger.error(f"Pipeline task {task.get_name()} did not stop within {_STOP_TIMEOUT}s, cancelled")
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        # Each flusher writes what is queued ahead of _FLUSH_STOP, including
+        # the batch it is collecting, and then returns
+        for task, queue in (
+            (self._log_flusher_task, self._log_queue),
+            (self._metrics_flusher_task, self._metrics_queue)
+        ):
+            if task is not None:
+                await queue.put(_FLUSH_STOP)
+                await asyncio.gather(task, return_exceptions=True)
+        self._log_flusher_task = None
+        self._metrics_flusher_task = None
+        
+        # Rows queued while no flusher was running
+        for queue, write in (
+            (self._log_queue, self._write_logs),
+            (self._metrics_queue, self._write_metrics)
+        ):
+            batch = []
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch:
+                await write(batch)
 
 # Create singleton instance
 pipeline_executor = PipelineExecutor() 
\ No newline at end of file
@@ -1,9 +1,10 @@
 """
 Pipeline service for managing data pipelines.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, FrozenSet, Tuple
 from datetime import datetime
 import logging
+from cachetools import TTLCache
 from fastapi import HTTPException, status
 
 from ..core.database import db_pool, DatabaseError
@@ -16,43 +17,153 @@ from .pipeline_executor import pipeline_executor
 
 logger = logging.getLogger(__name__)
 
+# Hot statements are module constants so each has one fixed text: asyncpg
+# prepares a statement once per pooled connection and reuses it from the
+# connection's statement cache (POSTGRES_STATEMENT_CACHE_SIZE) for every
+# later call, across pool acquires
+
+# Allowed (current, new) status pairs; str-valued enum members hash and
+# compare like their values, so plain status strings match too
+_VALID_TRANSITIONS: FrozenSet[Tuple[PipelineStatus, PipelineStatus]] = frozenset({
+    (PipelineStatus.CREATED, PipelineStatus.RUNNING),
+    (PipelineStatus.CREATED, PipelineStatus.FAILED),
+    (PipelineStatus.RUNNING, PipelineStatus.STOPPED),
+    (PipelineStatus.RUNNING, PipelineStatus.COMPLETED),
+    (PipelineStatus.RUNNING, PipelineStatus.FAILED),
+    (PipelineStatus.RUNNING, PipelineStatus.PAUSED),
+    (PipelineStatus.STOPPED, PipelineStatus.RUNNING),
+    (PipelineStatus.STOPPED, PipelineStatus.FAILED),
+    (PipelineStatus.FAILED, PipelineStatus.RUNNING),
+    (PipelineStatus.COMPLETED, PipelineStatus.RUNNING),
+    (PipelineStatus.PAUSED, PipelineStatus.RUNNING),
+    (PipelineStatus.PAUSED, PipelineStatus.STOPPED),
+    (PipelineStatus.PAUSED, PipelineStatus.FAILED)
+})
+
+# Matches when user $2 is a member of the organization owning pipeline $1;
+# embedded in EXISTS so access is checked in the same statement as the
+# read or write it guards
+_SQL_PIPELINE_ACCESS = """
+    SELECT 1
+    FROM pipelines p
+    JOIN data_sources ds ON p.data_source_id = ds.id
+    JOIN organization_members om ON ds.organization_id = om.organization_id
+    WHERE p.id = $1 AND om.user_id = $2
+"""
+
+# Current status of pipeline $1 if user $2 has access to it
+_SQL_PIPELINE_STATUS = """
+    SELECT p.status
+    FROM pipelines p
+    JOIN data_sources ds ON p.data_source_id = ds.id
+    JOIN organization_members om ON ds.organization_id = om.organization_id
+    WHERE p.id = $1 AND om.user_id = $2
+"""
+
+_PIPELINE_COLUMNS = """
+    id, name, description, config, type,
+    schedule, status, health, version,
+    organization_id, data_source_id,
+    created_at, updated_at, last_run
+"""
+
+_SQL_GET_PIPELINE = f"""
+    SELECT {_PIPELINE_COLUMNS}
+    FROM pipelines
+    WHERE id = $1 AND EXISTS ({_SQL_PIPELINE_ACCESS})
+"""
+
+_SQL_LIST_PIPELINES = """
+    SELECT p.id, p.name, p.description, p.config, p.type,
+           p.schedule, p.status, p.health, p.version,
+           p.organization_id, p.data_source_id,
+           p.created_at, p.updated_at, p.last_run,
+           p.id = ANY($2::bigint[]) AS is_running
+    FROM pipelines p
+    JOIN data_sources ds ON p.data_source_id = ds.id
+    WHERE ds.organization_id IN (
+        SELECT organization_id
+        FROM organization_members
+        WHERE user_id = $1
+    )
+    ORDER BY p.created_at DESC
+"""
+
+_SQL_PIPELINE_STATUS_ROWS = """
+    SELECT p.id, p.name, p.status, p.health,
+           p.last_run, pm.throughput, pm.error_rate,
+           pm.processed_records, pm.failed_records
+    FROM pipelines p
+    LEFT JOIN pipeline_metrics pm ON p.id = pm.pipeline_id
+    JOIN data_sources ds ON p.data_source_id = ds.id
+    WHERE ds.organization_id IN (
+        SELECT organization_id
+        FROM organization_members
+        WHERE user_id = $1
+    )
+    ORDER BY p.last_run DESC NULLS LAST
+"""
+
+# Totals over the rows get_pipeline_status lists; missing metrics count
+# as zero, so the error rate is averaged over all rows. Record sums are
+# cast back to bigint, as SUM of bigint returns numeric
+_SQL_PIPELINE_TOTALS = """
+    SELECT COUNT(*) AS total,
+           COUNT(*) FILTER (WHERE p.status = 'running') AS running,
+           COUNT(*) FILTER (WHERE p.status = 'failed') AS failed,
+           COUNT(*) FILTER (WHERE p.status = 'completed') AS completed,
+           COALESCE(SUM(pm.throughput), 0) AS throughput,
+           COALESCE(SUM(pm.error_rate) / NULLIF(COUNT(*), 0), 0) AS error_rate,
+           COALESCE(SUM(pm.processed_records), 0)::bigint AS processed_records,
+           COALESCE(SUM(pm.failed_records), 0)::bigint AS failed_records
+    FROM pipelines p
+    LEFT JOIN pipeline_metrics pm ON p.id = pm.pipeline_id
+    JOIN data_sources ds ON p.data_source_id = ds.id
+    WHERE ds.organization_id IN (
+        SELECT organization_id
+        FROM organization_members
+        WHERE user_id = $1
+    )
+"""
+
+_SQL_DELETE_PIPELINE = f"""
+    WITH target AS (
+        SELECT id FROM pipelines
+        WHERE id = $1 AND EXISTS ({_SQL_PIPELINE_ACCESS})
+    ), deleted_metrics AS (
+        DELETE FROM pipeline_metrics WHERE pipeline_id IN (SELECT id FROM target)
+    ), deleted_logs AS (
+        DELETE FROM pipeline_logs WHERE pipeline_id IN (SELECT id FROM target)
+    )
+    DELETE FROM pipelines WHERE id IN (SELECT id FROM target)
+    RETURNING id
+"""
+
+# Seconds the system-wide component, alert, health and metrics summaries
+# are reused; dashboards poll them and they need not be fresher
+_SUMMARY_TTL = 10
+
 class PipelineService:
     """Service for managing data pipelines."""
 
+    def __init__(self):
+        """Initialize pipeline service."""
+        # Summary name -> result; cleared whenever pipelines change here
+        self._summary_cache: TTLCache = TTLCache(maxsize=8, ttl=_SUMMARY_TTL)
+
     async def list_pipelines(self, user_id: int) -> List[Dict[str, Any]]:
         """List all pipelines for user's organizations."""
         try:
             async with db_pool.postgres_connection() as conn:
-                # Get user's organizations
-                org_ids = await conn.fetch("""
-                    SELECT organization_id
-                    FROM organization_members
-                    WHERE user_id = $1
-                """, user_id)
-                
-                if not org_ids:
-                    return []
-                
-                # Get pipelines for these organizations
-                pipelines = await conn.fetch("""
-                    SELECT p.id, p.name, p.description, p.config, p.type,
-                           p.schedule, p.status, p.health, p.version,
-                           p.organization_id, p.data_source_id,
-                           p.created_at, p.updated_at, p.last_run
-                    FROM pipelines p
-                    JOIN data_sources ds ON p.data_source_id = ds.id
-                    WHERE ds.organization_id = ANY($1::bigint[])
-                    ORDER BY p.created_at DESC
-                """, [org["organization_id"] for org in org_ids])
-                
-                # Add running status from executor
-                result = []
-                for pipeline in pipelines:
-                    pipeline_dict = dict(pipeline)
-                    pipeline_dict["is_running"] = pipeline["id"] in pipeline_executor._running_pipelines
-                    result.append(pipeline_dict)
+                # Get pipelines of the user's organizations; running status
+                # comes from the executor's ids, matched in the query
+                pipelines = await conn.fetch(
+                    _SQL_LIST_PIPELINES,
+                    user_id,
+                    list(pipeline_executor._running_pipelines)
+                )
                 
-                return result
+                return [dict(pipeline) for pipeline in pipelines]
         except DatabaseError as e:
             logger.error(f"Database error listing pipelines: {str(e)}")
             raise HTTPException(
@@ -106,6 +217,7 @@ class PipelineService:
                         VALUES ($1, 0, 0, 0, 0, 0, 0)
                     """, new_pipeline["id"])
                     
+                    self._summary_cache.clear()
                     return dict(new_pipeline)
         except DatabaseError as e:
             logger.error(f"Database error creating pipeline: {str(e)}")
@@ -120,16 +232,7 @@ class PipelineService:
         """Get a specific pipeline."""
         try:
             async with db_pool.postgres_connection() as conn:
-                pipeline = await conn.fetchrow("""
-                    SELECT p.id, p.name, p.description, p.config, p.type,
-                           p.schedule, p.status, p.health, p.version,
-                           p.organization_id, p.data_source_id,
-                           p.created_at, p.updated_at, p.last_run
-                    FROM pipelines p
-                    JOIN data_sources ds ON p.data_source_id = ds.id
-                    JOIN organization_members om ON ds.organization_id = om.organization_id
-                    WHERE p.id = $1 AND om.user_id = $2
-                """, pipeline_id, user_id)
+                pipeline = await conn.fetchrow(_SQL_GET_PIPELINE, pipeline_id, user_id)
                 
                 if not pipeline:
                     raise HTTPException(
@@ -154,75 +257,66 @@ class PipelineService:
     ) -> Dict[str, Any]:
         """Update a pipeline."""
         try:
+            # Validate status transition if status is being updated; this
+            # needs the current status, and access must be checked before
+            # the executor starts or stops anything
+            if pipeline_update.status:
+                async with db_pool.postgres_connection() as conn:
+                    current_status = await conn.fetchval(
+                        _SQL_PIPELINE_STATUS, pipeline_id, user_id
+                    )
+                
+                if current_status is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Pipeline not found or access denied"
+                    )
+                
+                self._validate_status_transition(
+                    current_status, pipeline_update.status
+                )
+                
+                # Handle pipeline execution based on status; no connection
+                # is held meanwhile, since a stop waits for the run to end
+                if pipeline_update.status == PipelineStatus.RUNNING:
+                    await pipeline_executor.start_pipeline(pipeline_id)
+                elif pipeline_update.status == PipelineStatus.STOPPED:
+                    await pipeline_executor.stop_pipeline(pipeline_id)
+            
             async with db_pool.postgres_connection() as conn:
-                async with conn.transaction():
-                    # Check access
-                    existing = await conn.fetchrow("""
-                        SELECT p.id, p.status
-                        FROM pipelines p
-                        JOIN data_sources ds ON p.data_source_id = ds.id
-                        JOIN organization_members om ON ds.organization_id = om.organization_id
-                        WHERE p.id = $1 AND om.user_id = $2
-                    """, pipeline_id, user_id)
-                    
-                    if not existing:
-                        raise HTTPException(
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            detail="Pipeline not found or access denied"
-                        )
-                    
-                    # Validate status transition if status is being updated
-                    if pipeline_update.status:
-                        self._validate_status_transition(
-                            existing["status"], pipeline_update.status
-                        )
-                        
-                        # Handle pipeline execution based on status
-                        if pipeline_update.status == PipelineStatus.RUNNING:
-                            await pipeline_executor.start_pipeline(pipeline_id)
-                        elif pipeline_update.status == PipelineStatus.STOPPED:
-                            await pipeline_executor.stop_pipeline(pipeline_id)
-                    
-                    # Update pipeline
-                    update_data = pipeline_update.dict(exclude_unset=True)
-                    if update_data:
-                        if "config" in update_data:
-                            update_data["config"] = update_data["config"].dict()
-                        
-                        fields = ", ".join(f"{k} = ${i+2}" for i, k in enumerate(update_data.keys()))
-                        values = list(update_data.values())
-                        query = f"""
-                            UPDATE pipelines 
-                            SET {fields}, updated_at = CURRENT_TIMESTAMP
-                            WHERE id = $1
-                            RETURNING id, name, description, config, type,
-                                      schedule, status, health, version,
-                                      organization_id, data_source_id,
-                                      created_at, updated_at, last_run
-                        """
-                        updated = await conn.fetchrow(query, pipeline_id, *values)
-                        
-                        # Add running status from executor
-                        updated_dict = dict(updated)
-                        updated_dict["is_running"] = pipeline_id in pipeline_executor._running_pipelines
-                        
-                        return updated_dict
+                # Update pipeline; access is checked by the UPDATE itself
+                update_data = pipeline_update.dict(exclude_unset=True)
+                if update_data:
+                    if "config" in update_data:
+                        update_data["config"] = update_data["config"].dict()
                     
+                    fields = ", ".join(f"{k} = ${i+3}" for i, k in enumerate(update_data.keys()))
+                    values = list(update_data.values())
+                    query = f"""
+                        UPDATE pipelines 
+                        SET {fields}, updated_at = CURRENT_TIMESTAMP
+                        WHERE id = $1 AND EXISTS ({_SQL_PIPELINE_ACCESS})
+                        RETURNING {_PIPELINE_COLUMNS}
+                    """
+                    pipeline = await conn.fetchrow(query, pipeline_id, user_id, *values)
+                else:
                     # If no updates, return current state
-                    current = await conn.fetchrow("""
-                        SELECT id, name, description, config, type,
-                               schedule, status, health, version,
-                               organization_id, data_source_id,
-                               created_at, updated_at, last_run
-                        FROM pipelines
-                        WHERE id = $1
-                    """, pipeline_id)
-                    
-                    # Add running status from executor
-                    current_dict = dict(current)
-                    current_dict["is_running"] = pipeline_id in pipeline_executor._running_pipelines
-                    
-                    return current_dict
+                    pipeline = await conn.fetchrow(_SQL_GET_PIPELINE, pipeline_id, user_id)
+            
+            if not pipeline:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Pipeline not found or access denied"
+                )
+            if update_data:
+                await pipeline_executor.invalidate_status(pipeline_id)
+                self._summary_cache.clear()
+            
+            # Add running status from executor
+            pipeline_dict = dict(pipeline)
+            pipeline_dict["is_running"] = pipeline_id in pipeline_executor._running_pipelines
+            
+            return pipeline_dict
         except DatabaseError as e:
             logger.error(f"Database error updating pipeline: {str(e)}")
             raise HTTPException(
@@ -233,41 +327,30 @@ class PipelineService:
     async def delete_pipeline(self, pipeline_id: int, user_id: int) -> None:
         """Delete a pipeline."""
         try:
+            # A running pipeline is stopped before it is deleted, so access
+            # is checked first on that path only. The connection is released
+            # before the stop, which waits for the run to end
+            if pipeline_id in pipeline_executor._running_pipelines:
+                async with db_pool.postgres_connection() as conn:
+                    has_access = await conn.fetchval(_SQL_PIPELINE_ACCESS, pipeline_id, user_id)
+                if not has_access:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Pipeline not found or access denied"
+                    )
+                await pipeline_executor.stop_pipeline(pipeline_id)
+            
+            # Delete the pipeline with its metrics and logs; access is
+            # checked by the statement itself
             async with db_pool.postgres_connection() as conn:
-                async with conn.transaction():
-                    # Check access
-                    existing = await conn.fetchrow("""
-                        SELECT p.id
-                        FROM pipelines p
-                        JOIN data_sources ds ON p.data_source_id = ds.id
-                        JOIN organization_members om ON ds.organization_id = om.organization_id
-                        WHERE p.id = $1 AND om.user_id = $2
-                    """, pipeline_id, user_id)
-                    
-                    if not existing:
-                        raise HTTPException(
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            detail="Pipeline not found or access denied"
-                        )
-                    
-                    # Stop pipeline if running
-                    if pipeline_id in pipeline_executor._running_pipelines:
-                        await pipeline_executor.stop_pipeline(pipeline_id)
-                    
-                    # Delete pipeline metrics
-                    await conn.execute("""
-                        DELETE FROM pipeline_metrics WHERE pipeline_id = $1
-                    """, pipeline_id)
-                    
-                    # Delete pipeline logs
-                    await conn.execute("""
-                        DELETE FROM pipeline_logs WHERE pipeline_id = $1
-                    """, pipeline_id)
-                    
-                    # Delete pipeline
-                    await conn.execute("""
-                        DELETE FROM pipelines WHERE id = $1
-                    """, pipeline_id)
+                deleted = await conn.fetchval(_SQL_DELETE_PIPELINE, pipeline_id, user_id)
+            if deleted is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Pipeline not found or access denied"
+                )
+            await pipeline_executor.invalidate_status(pipeline_id)
+            self._summary_cache.clear()
         except DatabaseError as e:
             logger.error(f"Database error deleting pipeline: {str(e)}")
             raise HTTPException(
@@ -280,27 +363,22 @@ class PipelineService:
     ) -> PipelineStatusResponse:
         """Start a pipeline."""
         try:
+            # Check access; it must pass before the executor acts. The
+            # connection is released first, as the executor uses its own
             async with db_pool.postgres_connection() as conn:
-                # Check access and get pipeline
-                pipeline = await conn.fetchrow("""
-                    SELECT p.id, p.status, p.config, p.health
-                    FROM pipelines p
-                    JOIN data_sources ds ON p.data_source_id = ds.id
-                    JOIN organization_members om ON ds.organization_id = om.organization_id
-                    WHERE p.id = $1 AND om.user_id = $2
-                """, pipeline_id, user_id)
-                
-                if not pipeline:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Pipeline not found or access denied"
-                    )
-                
-                # Start pipeline execution
-                await pipeline_executor.start_pipeline(pipeline_id)
-                
-                # Get updated status
-                return await pipeline_executor.get_pipeline_status(pipeline_id)
+                has_access = await conn.fetchval(_SQL_PIPELINE_ACCESS, pipeline_id, user_id)
+            if not has_access:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Pipeline not found or access denied"
+                )
+            
+            # Start pipeline execution
+            await pipeline_executor.start_pipeline(pipeline_id)
+            self._summary_cache.clear()
+            
+            # Get updated status
+            return await pipeline_executor.get_pipeline_status(pipeline_id)
         except DatabaseError as e:
             logger.error(f"Database error starting pipeline: {str(e)}")
             raise HTTPException(
@@ -313,27 +391,22 @@ class PipelineService:
     ) -> PipelineStatusResponse:
         """Stop a pipeline."""
         try:
+            # Check access; it must pass before the executor acts. The
+            # connection is released first, as the executor uses its own
             async with db_pool.postgres_connection() as conn:
-                # Check access and get pipeline
-                pipeline = await conn.fetchrow("""
-                    SELECT p.id, p.status, p.config, p.health
-                    FROM pipelines p
-                    JOIN data_sources ds ON p.data_source_id = ds.id
-                    JOIN organization_members om ON ds.organization_id = om.organization_id
-                    WHERE p.id = $1 AND om.user_id = $2
-                """, pipeline_id, user_id)
-                
-                if not pipeline:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Pipeline not found or access denied"
-                    )
-                
-                # Stop pipeline execution
-                await pipeline_executor.stop_pipeline(pipeline_id)
-                
-                # Get updated status
-                return await pipeline_executor.get_pipeline_status(pipeline_id)
+                has_access = await conn.fetchval(_SQL_PIPELINE_ACCESS, pipeline_id, user_id)
+            if not has_access:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Pipeline not found or access denied"
+                )
+            
+            # Stop pipeline execution
+            await pipeline_executor.stop_pipeline(pipeline_id)
+            self._summary_cache.clear()
+            
+            # Get updated status
+            return await pipeline_executor.get_pipeline_status(pipeline_id)
         except DatabaseError as e:
             logger.error(f"Database error stopping pipeline: {str(e)}")
             raise HTTPException(
@@ -352,24 +425,9 @@ class PipelineService:
         """Get pipeline logs."""
         try:
             async with db_pool.postgres_connection() as conn:
-                # Check access
-                access = await conn.fetchrow("""
-                    SELECT p.id
-                    FROM pipelines p
-                    JOIN data_sources ds ON p.data_source_id = ds.id
-                    JOIN organization_members om ON ds.organization_id = om.organization_id
-                    WHERE p.id = $1 AND om.user_id = $2
-                """, pipeline_id, user_id)
-                
-                if not access:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Pipeline not found or access denied"
-                    )
-                
-                # Build query conditions
-                conditions = ["pipeline_id = $1"]
-                params = [pipeline_id]
+                # Build query conditions; access is checked by the logs query
+                conditions = ["pipeline_id = $1", f"EXISTS ({_SQL_PIPELINE_ACCESS})"]
+                params = [pipeline_id, user_id]
                 if start_time:
                     conditions.append(f"timestamp >= ${len(params) + 1}")
                     params.append(start_time)
@@ -379,21 +437,26 @@ class PipelineService:
                 
                 where_clause = " AND ".join(conditions)
                 
-                # Get logs
+                # Get logs, with the total count for the time range
                 logs = await conn.fetch(f"""
-                    SELECT timestamp, level, message, details
+                    SELECT timestamp, level, message, details,
+                           COUNT(*) OVER () AS total
                     FROM pipeline_logs
                     WHERE {where_clause}
                     ORDER BY timestamp DESC
                     LIMIT $%s
                 """ % (len(params) + 1), *params, limit)
                 
-                # Get total count for the time range
-                total = await conn.fetchval(f"""
-                    SELECT COUNT(*)
-                    FROM pipeline_logs
-                    WHERE {where_clause}
-                """, *params)
+                # No rows means either no logs in range or no access
+                if logs:
+                    total = logs[0]["total"]
+                elif await conn.fetchval(_SQL_PIPELINE_ACCESS, pipeline_id, user_id):
+                    total = 0
+                else:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Pipeline not found or access denied"
+                    )
                 
                 return PipelineLogs(
                     logs=[PipelineLog(**dict(log)) for log in logs],
@@ -412,38 +475,7 @@ class PipelineService:
         self, current_status: str, new_status: str
     ) -> None:
         """Validate pipeline status transition."""
-        valid_transitions = {
-            PipelineStatus.CREATED: [
-                PipelineStatus.RUNNING,
-                PipelineStatus.FAILED
-            ],
-            PipelineStatus.RUNNING: [
-                PipelineStatus.STOPPED,
-                PipelineStatus.COMPLETED,
-                PipelineStatus.FAILED,
-                PipelineStatus.PAUSED
-            ],
-            PipelineStatus.STOPPED: [
-                PipelineStatus.RUNNING,
-                PipelineStatus.FAILED
-            ],
-            PipelineStatus.FAILED: [
-                PipelineStatus.RUNNING
-            ],
-            PipelineStatus.COMPLETED: [
-                PipelineStatus.RUNNING
-            ],
-            PipelineStatus.PAUSED: [
-                PipelineStatus.RUNNING,
-                PipelineStatus.STOPPED,
-                PipelineStatus.FAILED
-            ]
-        }
-        
-        if (
-            current_status not in valid_transitions or
-            new_status not in valid_transitions[current_status]
-        ):
+        if (current_status, new_status) not in _VALID_TRANSITIONS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid status transition from {current_status} to {new_status}"
@@ -453,42 +485,15 @@ class PipelineService:
         """Get overall pipeline status."""
         try:
             async with db_pool.postgres_connection() as conn:
-                # Get user's organizations
-                org_ids = await conn.fetch("""
-                    SELECT organization_id
-                    FROM organization_members
-                    WHERE user_id = $1
-                """, user_id)
+                # Get pipelines of the user's organizations
+                pipelines = await conn.fetch(_SQL_PIPELINE_STATUS_ROWS, user_id)
                 
-                if not org_ids:
-                    return {
-                        "status": "unknown",
-                        "pipelines": [],
-                        "metrics": {
-                            "total": 0,
-                            "running": 0,
-                            "failed": 0,
-                            "completed": 0
-                        }
-                    }
-                
-                # Get pipelines for these organizations
-                pipelines = await conn.fetch("""
-                    SELECT p.id, p.name, p.status, p.health,
-                           p.last_run, pm.throughput, pm.error_rate,
-                           pm.processed_records, pm.failed_records
-                    FROM pipelines p
-                    LEFT JOIN pipeline_metrics pm ON p.id = pm.pipeline_id
-                    JOIN data_sources ds ON p.data_source_id = ds.id
-                    WHERE ds.organization_id = ANY($1::bigint[])
-                    ORDER BY p.last_run DESC NULLS LAST
-                """, [org["organization_id"] for org in org_ids])
-                
-                # Calculate metrics
-                total = len(pipelines)
-                running = sum(1 for p in pipelines if p["status"] == "running")
-                failed = sum(1 for p in pipelines if p["status"] == "failed")
-                completed = sum(1 for p in pipelines if p["status"] == "completed")
+                # Calculate metrics over the same rows in one pass
+                totals = await conn.fetchrow(_SQL_PIPELINE_TOTALS, user_id)
+                total = totals["total"]
+                running = totals["running"]
+                failed = totals["failed"]
+                completed = totals["completed"]
                 
                 # Calculate overall health
                 if total == 0:
@@ -508,10 +513,10 @@ class PipelineService:
                         "running": running,
                         "failed": failed,
                         "completed": completed,
-                        "throughput": sum(p["throughput"] or 0 for p in pipelines),
-                        "error_rate": sum(p["error_rate"] or 0 for p in pipelines) / total if total > 0 else 0,
-                        "processed_records": sum(p["processed_records"] or 0 for p in pipelines),
-                        "failed_records": sum(p["failed_records"] or 0 for p in pipelines)
+                        "throughput": totals["throughput"],
+                        "error_rate": totals["error_rate"],
+                        "processed_records": totals["processed_records"],
+                        "failed_records": totals["failed_records"]
                     }
                 }
                 
@@ -530,6 +535,10 @@ class PipelineService:
 
     async def list_components(self) -> List[Dict[str, Any]]:
         """List all pipeline components with their status."""
+        cached = self._summary_cache.get("components")
+        if cached is not None:
+            return cached
+        
         try:
             async with db_pool.postgres_connection() as conn:
                 # Get all pipeline components
@@ -566,6 +575,7 @@ class PipelineService:
                         "last_updated": comp["last_updated"]
                     })
                 
+                self._summary_cache["components"] = result
                 return result
         except DatabaseError as e:
             logger.error(f"Database error listing pipeline components: {str(e)}")
@@ -576,6 +586,10 @@ class PipelineService:
 
     async def list_alerts(self) -> List[Dict[str, Any]]:
         """List all active pipeline alerts."""
+        cached = self._summary_cache.get("alerts")
+        if cached is not None:
+            return cached
+        
         try:
             async with db_pool.postgres_connection() as conn:
                 alerts = await conn.fetch("""
@@ -586,7 +600,9 @@ class PipelineService:
                     ORDER BY created_at DESC
                 """)
                 
-                return [dict(alert) for alert in alerts]
+                result = [dict(alert) for alert in alerts]
+                self._summary_cache["alerts"] = result
+                return result
         except DatabaseError as e:
             logger.error(f"Database error listing pipeline alerts: {str(e)}")
             raise HTTPException(
@@ -596,6 +612,10 @@ class PipelineService:
 
     async def get_overall_health(self) -> str:
         """Get overall pipeline system health."""
+        cached = self._summary_cache.get("health")
+        if cached is not None:
+            return cached
+        
         try:
             async with db_pool.postgres_connection() as conn:
                 # Get health stats
@@ -609,17 +629,20 @@ class PipelineService:
                 """)
                 
                 if not stats["total"]:
-                    return "unknown"
-                
-                healthy_ratio = stats["healthy"] / stats["total"]
-                degraded_ratio = stats["degraded"] / stats["total"]
-                
-                if healthy_ratio >= 0.9:
-                    return "healthy"
-                elif healthy_ratio + degraded_ratio >= 0.7:
-                    return "degraded"
+                    health = "unknown"
                 else:
-                    return "unhealthy"
+                    healthy_ratio = stats["healthy"] / stats["total"]
+                    degraded_ratio = stats["degraded"] / stats["total"]
+                    
+                    if healthy_ratio >= 0.9:
+                        health = "healthy"
+                    elif healthy_ratio + degraded_ratio >= 0.7:
+                        health = "degraded"
+                    else:
+                        health = "unhealthy"
+                
+                self._summary_cache["health"] = health
+                return health
         except DatabaseError as e:
             logger.error(f"Database error getting overall health: {str(e)}")
             raise HTTPException(
@@ -629,6 +652,10 @@ class PipelineService:
 
     async def get_overall_metrics(self) -> Dict[str, float]:
         """Get aggregated metrics for all pipelines."""
+        cached = self._summary_cache.get("metrics")
+        if cached is not None:
+            return cached
+        
         try:
             async with db_pool.postgres_connection() as conn:
                 metrics = await conn.fetchrow("""
@@ -642,7 +669,7 @@ class PipelineService:
                     FROM pipeline_metrics
                 """)
                 
-                return {
+                result = {
                     "average_throughput": float(metrics["avg_throughput"] or 0),
                     "average_latency": float(metrics["avg_latency"] or 0),
                     "average_error_rate": float(metrics["avg_error_rate"] or 0),
@@ -650,6 +677,8 @@ class PipelineService:
                     "total_processed_records": int(metrics["total_processed"] or 0),
                     "total_failed_records": int(metrics["total_failed"] or 0)
                 }
+                self._summary_cache["metrics"] = result
+                return result
         except DatabaseError as e:
             logger.error(f"Database error getting overall metrics: {str(e)}")
             raise HTTPException(
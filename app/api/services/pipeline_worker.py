@@ -0,0 +1,240 @@
+"""
+Pipeline worker process.
+
+Runs pipelines started through the API when PIPELINE_WORKER_ENABLED is set,
+so long runs do not share the API's event loop and connection pool:
+
+    python -m app.api.services.pipeline_worker
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import Any, Coroutine, Dict, Set, Tuple
+from fastapi import HTTPException
+from redis.exceptions import ResponseError
+
+from ..core.database import db_pool
+from .pipeline_executor import (
+    pipeline_executor,
+    PIPELINE_START_STREAM,
+    PIPELINE_STOP_STREAM
+)
+
+logger = logging.getLogger(__name__)
+
+# Workers share one consumer group, so each start request runs once
+_CONSUMER_GROUP = "pipeline-workers"
+_READ_COUNT = 10
+_READ_BLOCK_MS = 5000
+# A start request stays pending until its run ends, and the worker running
+# it renews it every _HEARTBEAT_INTERVAL seconds. One idle for longer than
+# _CLAIM_IDLE_MS belongs to a worker that died, and another worker resumes
+# its run
+_HEARTBEAT_INTERVAL = 10.0
+_CLAIM_IDLE_MS = 60_000
+
+def _stream_id(entry_id: str) -> Tuple[int, int]:
+    """Stream entry ID as a comparable (milliseconds, sequence) pair."""
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+class PipelineWorker:
+    """Runs pipelines from the start stream and stops them from the stop stream."""
+
+    def __init__(self):
+        """Initialize pipeline worker."""
+        self._name = f"{socket.gethostname()}-{os.getpid()}"
+        # Start request of each run on this worker, acknowledged when it ends
+        self._entries: Dict[int, str] = {}
+        # Latest stop request per pipeline; starts queued before it are dropped
+        self._stops: Dict[int, Tuple[int, int]] = {}
+        # Background halts and acknowledgements, awaited by drain()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        """Consume start and stop requests until cancelled."""
+        redis = await db_pool.redis_connection()
+        try:
+            await redis.xgroup_create(
+                PIPELINE_START_STREAM, _CONSUMER_GROUP, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            # The group already exists when another worker created it
+            if "BUSYGROUP" not in str(e):
+                raise
+
+        # Stops sent before this worker started still apply to starts queued
+        # before them, so they are loaded before any start is taken
+        last_stop_id = await self._load_stops(redis)
+
+        logger.info(f"Pipeline worker {self._name} started")
+        await asyncio.gather(
+            self._consume_starts(redis),
+            self._consume_stops(redis, last_stop_id),
+            self._heartbeat(redis)
+        )
+
+    async def drain(self) -> None:
+        """Wait for background halts and acknowledgements to finish."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Run a coroutine in the background, keeping a reference to it."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _consume_starts(self, redis) -> None:
+        """Run each start request assigned to this worker.
+
+        Requests a dead worker left pending are reclaimed and their runs
+        resumed before new requests are read.
+        """
+        while True:
+            reclaimed = await redis.xautoclaim(
+                PIPELINE_START_STREAM,
+                _CONSUMER_GROUP,
+                self._name,
+                min_idle_time=_CLAIM_IDLE_MS,
+                count=_READ_COUNT
+            )
+            for entry_id, fields in reclaimed[1]:
+                await self._start(redis, entry_id, fields, resume=True)
+
+            response = await redis.xreadgroup(
+                _CONSUMER_GROUP,
+                self._name,
+                {PIPELINE_START_STREAM: ">"},
+                count=_READ_COUNT,
+                block=_READ_BLOCK_MS
+            )
+            for _, entries in response:
+                for entry_id, fields in entries:
+                    await self._start(redis, entry_id, fields, resume=False)
+
+    async def _start(self, redis, entry_id: str, fields, resume: bool) -> None:
+        """Run one start request; it is acknowledged once the run ends."""
+        # Entries trimmed from the stream come back from XAUTOCLAIM without fields
+        if not fields:
+            await redis.xack(PIPELINE_START_STREAM, _CONSUMER_GROUP, entry_id)
+            return
+
+        pipeline_id = int(fields["id"])
+        stop_id = self._stops.get(pipeline_id)
+        if stop_id is not None and stop_id > _stream_id(entry_id):
+            logger.info(f"Pipeline {pipeline_id} not started: stopped while queued")
+            if resume:
+                # The dead worker's run was stopped before it could be resumed
+                try:
+                    await pipeline_executor.release_pipeline(pipeline_id)
+                except Exception as e:
+                    logger.error(f"Error releasing pipeline {pipeline_id}: {str(e)}")
+            await redis.xack(PIPELINE_START_STREAM, _CONSUMER_GROUP, entry_id)
+            return
+
+        try:
+            await pipeline_executor.run_pipeline(pipeline_id, resume=resume)
+        except HTTPException as e:
+            logger.warning(f"Pipeline {pipeline_id} not started: {e.detail}")
+        except Exception as e:
+            logger.error(f"Error starting pipeline {pipeline_id}: {str(e)}")
+        else:
+            state = pipeline_executor._running_pipelines.get(pipeline_id)
+            if state is not None:
+                self._entries[pipeline_id] = entry_id
+                self._spawn(self._ack_when_done(redis, pipeline_id, entry_id, state.task))
+                return
+        await redis.xack(PIPELINE_START_STREAM, _CONSUMER_GROUP, entry_id)
+
+    async def _ack_when_done(self, redis, pipeline_id: int, entry_id: str, task: asyncio.Task) -> None:
+        """Acknowledge a start request once its run has ended."""
+        await asyncio.wait([task])
+        self._entries.pop(pipeline_id, None)
+        try:
+            await redis.xack(PIPELINE_START_STREAM, _CONSUMER_GROUP, entry_id)
+        except Exception as e:
+            logger.error(f"Error acknowledging start of pipeline {pipeline_id}: {str(e)}")
+
+    async def _heartbeat(self, redis) -> None:
+        """Keep the start requests of runs on this worker from being reclaimed."""
+        while True:
+            await asyncio.sleep(_HEARTBEAT_INTERVAL)
+            if not self._entries:
+                continue
+            try:
+                # Claiming its own entries resets their idle time
+                await redis.xclaim(
+                    PIPELINE_START_STREAM,
+                    _CONSUMER_GROUP,
+                    self._name,
+                    0,
+                    list(self._entries.values()),
+                    justid=True
+                )
+            except Exception as e:
+                logger.error(f"Error renewing pipeline start requests: {str(e)}")
+
+    async def _load_stops(self, redis) -> str:
+        """Record the stop requests already in the stream; returns the last ID."""
+        last_id = "0"
+        for entry_id, fields in await redis.xrange(PIPELINE_STOP_STREAM):
+            last_id = entry_id
+            self._stops[int(fields["id"])] = _stream_id(entry_id)
+        return last_id
+
+    async def _consume_stops(self, redis, last_id: str) -> None:
+        """Record each stop request and halt the pipelines this worker runs.
+
+        Every worker reads every stop request: the worker running a pipeline
+        halts it, and a start of it still queued is dropped by whichever
+        worker takes it. Halts run in the background, so a slow one does not
+        hold up the stops after it.
+        """
+        while True:
+            response = await redis.xread(
+                {PIPELINE_STOP_STREAM: last_id},
+                count=_READ_COUNT,
+                block=_READ_BLOCK_MS
+            )
+            for _, entries in response:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    pipeline_id = int(fields["id"])
+                    self._stops[pipeline_id] = _stream_id(entry_id)
+                    if pipeline_id in pipeline_executor._running_pipelines:
+                        self._spawn(self._halt(pipeline_id))
+
+    async def _halt(self, pipeline_id: int) -> None:
+        """Halt a pipeline running on this worker."""
+        try:
+            await pipeline_executor.halt_pipeline(pipeline_id)
+        except HTTPException:
+            # The run ended on its own before the stop arrived
+            pass
+        except Exception as e:
+            logger.error(f"Error stopping pipeline {pipeline_id}: {str(e)}")
+
+async def main() -> None:
+    """Run a pipeline worker until SIGTERM or SIGINT."""
+    worker = PipelineWorker()
+    worker_task = asyncio.create_task(worker.run())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker_task.cancel)
+
+    try:
+        await worker_task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        # Running pipelines record their final status and their start
+        # requests are acknowledged before the pools close
+        await pipeline_executor.shutdown()
+        await worker.drain()
+        await db_pool.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
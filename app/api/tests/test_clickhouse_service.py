@@ -0,0 +1,47 @@
+"""
+Tests for the ClickHouse service.
+"""
+import pytest
+from ..services.clickhouse import clickhouse_service
+
+@pytest.fixture
+def mock_client(mocker):
+    """Mock ClickHouse client streaming two blocks of rows."""
+    db_pool = mocker.patch('app.api.services.clickhouse.db_pool')
+    client = mocker.MagicMock()
+    db_pool.clickhouse_connection.return_value.__aenter__.return_value = client
+
+    stream = mocker.MagicMock()
+    stream.__enter__.return_value = stream
+    stream.source.column_names = ("name", "value")
+    stream.__iter__.return_value = iter([[("a", 1), ("b", 2)], [("c", 3)]])
+    client.query_row_block_stream.return_value = stream
+    return client
+
+async def test_iter_query(mock_client):
+    """Test streaming query rows block by block."""
+    # Execute
+    rows = [row async for row in clickhouse_service.iter_query("SELECT name, value FROM t", {"x": 1})]
+
+    # Assert
+    assert rows == [
+        {"name": "a", "value": 1},
+        {"name": "b", "value": 2},
+        {"name": "c", "value": 3}
+    ]
+    mock_client.query_row_block_stream.assert_called_once_with(
+        "SELECT name, value FROM t", parameters={"x": 1}
+    )
+    # The stream is closed once consumed
+    mock_client.query_row_block_stream.return_value.__exit__.assert_called_once()
+
+async def test_execute_query(mock_client):
+    """Test that execute_query collects the streamed rows."""
+    # Execute
+    rows = await clickhouse_service.execute_query("SELECT name, value FROM t")
+
+    # Assert
+    assert [row["name"] for row in rows] == ["a", "b", "c"]
+    mock_client.query_row_block_stream.assert_called_once_with(
+        "SELECT name, value FROM t", parameters={}
+    )
@@ -9,7 +9,7 @@ from ..models.data_source import (
     DataSourceType, DataSourceStatus, DataSourceHealth,
     ConnectionConfig
 )
-from ..services.data_source_service import data_source_service
+from ..services.data_source_service import data_source_service, _SQL_LOCK_SOURCE_NAME
 
 @pytest.fixture
 def mock_db_pool(mocker):
@@ -19,7 +19,10 @@ def mock_db_pool(mocker):
 @pytest.fixture
 def mock_conn(mocker):
     """Mock database connection."""
-    return mocker.AsyncMock()
+    conn = mocker.AsyncMock()
+    # conn.transaction() is a plain call returning an async context manager
+    conn.transaction = mocker.MagicMock()
+    return conn
 
 @pytest.fixture
 def sample_connection_config():
@@ -116,11 +119,7 @@ async def test_create_data_source(mock_db_pool, mock_conn, sample_data_source_cr
     """Test creating a data source."""
     # Setup
     mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
-    mock_conn.fetchrow.side_effect = [
-        {"id": 1},  # org access check
-        None,       # name uniqueness check
-        sample_data_source_db  # creation result
-    ]
+    mock_conn.fetchrow.return_value = sample_data_source_db  # checks and insert in one statement
     
     # Execute
     result = await data_source_service.create_data_source(sample_data_source_create, user_id=1)
@@ -128,7 +127,39 @@ async def test_create_data_source(mock_db_pool, mock_conn, sample_data_source_cr
     # Assert
     assert result["id"] == sample_data_source_db["id"]
     assert result["name"] == sample_data_source_db["name"]
-    assert mock_conn.fetchrow.call_count == 3
+    mock_conn.fetchrow.assert_called_once()
+    mock_conn.fetchval.assert_not_called()
+    # Creates of the same name are serialized on an advisory lock
+    mock_conn.transaction.assert_called_once()
+    mock_conn.execute.assert_called_once_with(
+        _SQL_LOCK_SOURCE_NAME,
+        sample_data_source_create.organization_id,
+        sample_data_source_create.name
+    )
+
+async def test_create_data_source_no_access(mock_db_pool, mock_conn, sample_data_source_create):
+    """Test creating a data source without organization access."""
+    # Setup
+    mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
+    mock_conn.fetchrow.return_value = None  # nothing inserted
+    mock_conn.fetchval.return_value = False  # no organization access
+    
+    # Execute & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await data_source_service.create_data_source(sample_data_source_create, user_id=1)
+    assert exc_info.value.status_code == 403
+
+async def test_create_data_source_duplicate_name(mock_db_pool, mock_conn, sample_data_source_create):
+    """Test creating a data source with a name already in use."""
+    # Setup
+    mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
+    mock_conn.fetchrow.return_value = None  # nothing inserted
+    mock_conn.fetchval.return_value = True  # organization access granted
+    
+    # Execute & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await data_source_service.create_data_source(sample_data_source_create, user_id=1)
+    assert exc_info.value.status_code == 400
 
 async def test_get_data_source(mock_db_pool, mock_conn, sample_data_source_db):
     """Test getting a data source."""
@@ -148,11 +179,7 @@ async def test_update_data_source(mock_db_pool, mock_conn, sample_data_source_db
     """Test updating a data source."""
     # Setup
     mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
-    mock_conn.fetchrow.side_effect = [
-        sample_data_source_db,  # get current
-        None,                   # name uniqueness check
-        {**sample_data_source_db, "name": "Updated Name"}  # update result
-    ]
+    mock_conn.fetchrow.return_value = {**sample_data_source_db, "name": "Updated Name"}  # update result
     
     update_data = DataSourceUpdate(name="Updated Name")
     
@@ -161,7 +188,39 @@ async def test_update_data_source(mock_db_pool, mock_conn, sample_data_source_db
     
     # Assert
     assert result["name"] == "Updated Name"
-    assert mock_conn.fetchrow.call_count == 3
+    mock_conn.fetchrow.assert_called_once()  # checks and update in one statement
+
+async def test_update_data_source_duplicate_name(mock_db_pool, mock_conn, sample_data_source_db):
+    """Test renaming a data source to a name already in use."""
+    # Setup
+    mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
+    mock_conn.fetchrow.side_effect = [
+        None,                  # nothing updated
+        sample_data_source_db  # data source is visible to the user
+    ]
+    
+    update_data = DataSourceUpdate(name="Existing Name")
+    
+    # Execute & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await data_source_service.update_data_source(source_id=1, source_update=update_data, user_id=1)
+    assert exc_info.value.status_code == 400
+
+async def test_access_checked_lookups_share_sql(mock_db_pool, mock_conn, sample_data_source_db):
+    """Test that single-source lookups all send the same access-check SQL."""
+    # Setup
+    mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
+    mock_conn.fetchrow.return_value = sample_data_source_db
+    
+    # Execute
+    await data_source_service.get_data_source(source_id=1, user_id=1)
+    await data_source_service.update_data_source(
+        source_id=1, source_update=DataSourceUpdate(), user_id=1
+    )
+    
+    # Assert
+    queries = {call.args[0] for call in mock_conn.fetchrow.call_args_list}
+    assert len(queries) == 1
 
 async def test_delete_data_source(mock_db_pool, mock_conn):
     """Test deleting a data source."""
@@ -122,7 +122,6 @@ async def test_validate_postgresql(mocker, sample_postgresql_config):
     """Test PostgreSQL validation."""
     # Mock database connection and query
     mock_conn = mocker.AsyncMock()
-    mock_conn.execute.return_value = None
     mock_conn.fetchrow.return_value = {
         "database": "test_db",
         "version": "PostgreSQL 14.0",
@@ -198,8 +197,8 @@ async def test_validate_redis(mocker, sample_redis_config):
     mock_redis = mocker.AsyncMock()
     mock_redis.info.return_value = {
         "redis_version": "6.2",
-        "connected_clients": 10,
-        "used_memory_human": "1M"
+        "redis_mode": "standalone",
+        "uptime_in_seconds": 3600
     }
     
     mocker.patch("aioredis.from_url", return_value=mock_redis)
@@ -299,11 +298,22 @@ async def test_validate_unsupported_type():
     assert result.health == DataSourceHealth.UNKNOWN
     assert "Unsupported data source type" in result.error_message
 
+async def test_validate_many_preserves_order():
+    """Test concurrent validation of several data sources."""
+    results = await data_source_validator.validate_many([
+        ("unsupported_type_a", {"connection": {}}),
+        ("unsupported_type_b", {"connection": {}})
+    ])
+    
+    assert len(results) == 2
+    assert "unsupported_type_a" in results[0].error_message
+    assert "unsupported_type_b" in results[1].error_message
+
 async def test_validate_connection_timeout(mocker, sample_postgresql_config):
     """Test validation timeout."""
     # Mock database connection that takes too long
     mock_conn = mocker.AsyncMock()
-    mock_conn.execute.side_effect = asyncio.sleep(10)
+    mock_conn.fetchrow.side_effect = asyncio.sleep(10)
     
     mocker.patch("app.api.core.database.db_pool.get_postgres_conn",
                  return_value=mocker.AsyncMock(__aenter__=mocker.AsyncMock(return_value=mock_conn)))
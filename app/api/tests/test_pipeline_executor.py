@@ -9,7 +9,16 @@ from ..models.pipeline import (
     PipelineStatus, PipelineHealth, PipelineMetrics,
     LogLevel
 )
-from ..services.pipeline_executor import pipeline_executor
+from ..services.pipeline_executor import (
+    pipeline_executor,
+    _RunState,
+    _SQL_PIPELINE_RUN_STATUS,
+    _SQL_START_PIPELINE,
+    _SQL_RESUME_PIPELINE,
+    _SQL_FETCH_STATUS,
+    _SQL_UPDATE_STATUS,
+    _FLUSH_STOP
+)
 
 @pytest.fixture
 def mock_db_pool(mocker):
@@ -72,22 +81,15 @@ async def test_start_pipeline(mock_db_pool, mock_conn, sample_pipeline):
 
     # Assert
     assert 1 in pipeline_executor._running_pipelines
-    assert isinstance(pipeline_executor._pipeline_metrics[1], PipelineMetrics)
-    mock_conn.fetchrow.assert_called_once_with("""
-        SELECT id, name, type, config, schedule
-        FROM pipelines
-        WHERE id = $1
-    """, 1)
-    mock_conn.execute.assert_called_with("""
-        INSERT INTO pipeline_logs (
-            pipeline_id, level, message, details
-        ) VALUES ($1, $2, $3, $4)
-    """, 1, LogLevel.INFO, "Pipeline Test Pipeline started", {"type": "etl"})
+    assert isinstance(pipeline_executor._running_pipelines[1].metrics(), PipelineMetrics)
+    mock_conn.fetchrow.assert_called_once_with(
+        _SQL_START_PIPELINE, 1, PipelineStatus.RUNNING, PipelineHealth.HEALTHY
+    )
 
 async def test_start_pipeline_already_running(mock_db_pool, mock_conn):
     """Test starting an already running pipeline."""
     # Setup
-    pipeline_executor._running_pipelines[1] = asyncio.create_task(asyncio.sleep(0))
+    pipeline_executor._running_pipelines[1] = _RunState(asyncio.create_task(asyncio.sleep(0)))
 
     # Execute and Assert
     with pytest.raises(HTTPException) as exc_info:
@@ -96,49 +98,80 @@ async def test_start_pipeline_already_running(mock_db_pool, mock_conn):
     assert "Pipeline is already running" in exc_info.value.detail
 
     # Cleanup
-    pipeline_executor._running_pipelines[1].cancel()
+    pipeline_executor._running_pipelines[1].task.cancel()
     del pipeline_executor._running_pipelines[1]
 
-async def test_stop_pipeline(mock_db_pool, mock_conn):
-    """Test stopping a pipeline."""
+async def test_start_pipeline_running_elsewhere(mock_db_pool, mock_conn):
+    """Test starting a pipeline another worker already marked running."""
+    # Setup; the conditional start updates no row
+    mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
+    mock_conn.fetchrow.return_value = None
+    mock_conn.fetchval.return_value = PipelineStatus.RUNNING
+
+    # Execute and Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await pipeline_executor.run_pipeline(1)
+    assert exc_info.value.status_code == 400
+    assert "Pipeline is already running" in exc_info.value.detail
+    assert 1 not in pipeline_executor._running_pipelines
+    mock_conn.fetchval.assert_called_once_with(_SQL_PIPELINE_RUN_STATUS, 1)
+
+async def test_start_pipeline_not_found(mock_db_pool, mock_conn):
+    """Test starting a non-existent pipeline."""
+    # Setup
+    mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
+    mock_conn.fetchrow.return_value = None
+    mock_conn.fetchval.return_value = None
+
+    # Execute and Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await pipeline_executor.run_pipeline(1)
+    assert exc_info.value.status_code == 404
+
+async def test_resume_pipeline(mock_db_pool, mock_conn, sample_pipeline):
+    """Test taking over a run left by a worker that died."""
     # Setup
     mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
-    pipeline_executor._running_pipelines[1] = asyncio.create_task(asyncio.sleep(0))
-    pipeline_executor._pipeline_metrics[1] = PipelineMetrics(
-        throughput=0.0,
-        latency=0.0,
-        error_rate=0.0,
-        success_rate=0.0,
-        processed_records=0,
-        failed_records=0
+    mock_conn.fetchrow.return_value = sample_pipeline
+
+    # Execute
+    await pipeline_executor.run_pipeline(1, resume=True)
+
+    # Assert
+    assert 1 in pipeline_executor._running_pipelines
+    mock_conn.fetchrow.assert_called_once_with(
+        _SQL_RESUME_PIPELINE, 1, PipelineStatus.RUNNING, PipelineHealth.HEALTHY
     )
 
+    # Cleanup
+    pipeline_executor._running_pipelines.pop(1).task.cancel()
+
+async def test_stop_pipeline(mock_db_pool, mock_conn):
+    """Test stopping a pipeline that winds down on its own."""
+    # Setup
+    mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
+    pipeline_executor._running_pipelines[1] = _RunState(asyncio.create_task(asyncio.sleep(0)))
+
+    # Execute
+    await pipeline_executor.stop_pipeline(1)
+
+    # Assert; the run records its own final status
+    assert 1 not in pipeline_executor._running_pipelines
+    mock_conn.execute.assert_not_called()
+
+async def test_stop_pipeline_cancelled(mock_db_pool, mock_conn, mocker):
+    """Test stopping a pipeline that has to be cancelled."""
+    # Setup
+    mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
+    mocker.patch('app.api.services.pipeline_executor._STOP_TIMEOUT', 0.01)
+    pipeline_executor._running_pipelines[1] = _RunState(asyncio.create_task(asyncio.sleep(10)))
+
     # Execute
     await pipeline_executor.stop_pipeline(1)
 
     # Assert
     assert 1 not in pipeline_executor._running_pipelines
-    assert 1 not in pipeline_executor._pipeline_metrics
-    mock_conn.execute.assert_has_calls([
-        mocker.call("""
-            UPDATE pipelines
-            SET status = $2,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = $1
-        """, 1, PipelineStatus.STOPPED),
-        mocker.call("""
-            INSERT INTO pipeline_logs (
-                pipeline_id, level, message, details
-            ) VALUES ($1, $2, $3, $4)
-        """, 1, LogLevel.INFO, "Pipeline stopped", {"final_metrics": {
-            "throughput": 0.0,
-            "latency": 0.0,
-            "error_rate": 0.0,
-            "success_rate": 0.0,
-            "processed_records": 0,
-            "failed_records": 0
-        }})
-    ])
+    mock_conn.execute.assert_called_once_with(_SQL_UPDATE_STATUS, 1, PipelineStatus.STOPPED)
 
 async def test_stop_pipeline_not_running(mock_db_pool, mock_conn):
     """Test stopping a non-running pipeline."""
@@ -157,8 +190,13 @@ async def test_get_pipeline_status(mock_db_pool, mock_conn, sample_metrics):
         "health": PipelineHealth.HEALTHY,
         "last_run": datetime.now(timezone.utc)
     }
-    pipeline_executor._running_pipelines[1] = asyncio.create_task(asyncio.sleep(0))
-    pipeline_executor._pipeline_metrics[1] = PipelineMetrics(**sample_metrics)
+    pipeline_executor._running_pipelines[1] = _RunState(
+        asyncio.create_task(asyncio.sleep(0)),
+        throughput=sample_metrics["throughput"],
+        latency=sample_metrics["latency"],
+        processed_records=sample_metrics["processed_records"],
+        failed_records=sample_metrics["failed_records"]
+    )
 
     # Execute
     status = await pipeline_executor.get_pipeline_status(1)
@@ -169,16 +207,11 @@ async def test_get_pipeline_status(mock_db_pool, mock_conn, sample_metrics):
     assert status["is_running"] is True
     assert isinstance(status["metrics"], PipelineMetrics)
     assert isinstance(status["last_run"], datetime)
-    mock_conn.fetchrow.assert_called_once_with("""
-        SELECT status, health, last_run
-        FROM pipelines
-        WHERE id = $1
-    """, 1)
+    mock_conn.fetchrow.assert_called_once_with(_SQL_FETCH_STATUS, 1)
 
     # Cleanup
-    pipeline_executor._running_pipelines[1].cancel()
+    pipeline_executor._running_pipelines[1].task.cancel()
     del pipeline_executor._running_pipelines[1]
-    del pipeline_executor._pipeline_metrics[1]
 
 async def test_get_pipeline_status_not_found(mock_db_pool, mock_conn):
     """Test getting status of non-existent pipeline."""
@@ -195,27 +228,21 @@ async def test_get_pipeline_status_not_found(mock_db_pool, mock_conn):
 async def test_update_metrics():
     """Test updating pipeline metrics."""
     # Setup
-    pipeline_executor._pipeline_metrics[1] = PipelineMetrics(
-        throughput=0.0,
-        latency=0.0,
-        error_rate=0.0,
-        success_rate=0.0,
-        processed_records=0,
-        failed_records=0
-    )
+    pipeline_executor._running_pipelines[1] = _RunState(asyncio.create_task(asyncio.sleep(0)))
 
     # Execute
     await pipeline_executor._update_metrics(1, 100, 1)
 
     # Assert
-    metrics = pipeline_executor._pipeline_metrics[1]
+    metrics = pipeline_executor._running_pipelines[1]
     assert metrics.processed_records == 100
     assert metrics.failed_records == 1
     assert metrics.success_rate == 99.0
     assert metrics.error_rate == 1.0
 
     # Cleanup
-    del pipeline_executor._pipeline_metrics[1]
+    pipeline_executor._running_pipelines[1].task.cancel()
+    del pipeline_executor._running_pipelines[1]
 
 async def test_log_pipeline_event(mock_db_pool, mock_conn):
     """Test logging pipeline event."""
@@ -223,14 +250,37 @@ async def test_log_pipeline_event(mock_db_pool, mock_conn):
     mock_db_pool.postgres_connection.return_value.__aenter__.return_value = mock_conn
     details = {"test": "data"}
 
-    # Execute
+    # Execute; shutdown writes the queued entry
     await pipeline_executor._log_pipeline_event(
         1, LogLevel.INFO, "Test message", details
     )
+    await pipeline_executor.shutdown()
+
+    # Assert
+    mock_conn.copy_records_to_table.assert_called_once()
+    args, kwargs = mock_conn.copy_records_to_table.call_args
+    assert args == ("pipeline_logs",)
+    assert kwargs["columns"] == ("pipeline_id", "level", "message", "details", "timestamp")
+    assert kwargs["records"][0][:4] == (1, LogLevel.INFO, "Test message", details)
+
+async def test_flush_batches_writes_partial_batch_on_stop():
+    """Test that the batch in progress is written when the flusher stops."""
+    # Setup
+    queue = asyncio.Queue()
+    written = []
+
+    async def write(batch):
+        written.append(batch)
+
+    for row in range(3):
+        queue.put_nowait(row)
+    queue.put_nowait(_FLUSH_STOP)
+
+    # Execute; the flusher returns once it reads _FLUSH_STOP
+    await asyncio.wait_for(
+        pipeline_executor._flush_batches(queue, write), timeout=1
+    )
 
     # Assert
-    mock_conn.execute.assert_called_once_with("""
-        INSERT INTO pipeline_logs (
-            pipeline_id, level, message, details
-        ) VALUES ($1, $2, $3, $4)
-    """, 1, LogLevel.INFO, "Test message", details) 
\ No newline at end of file
+    assert written == [[0, 1, 2]]
+    assert queue.empty()
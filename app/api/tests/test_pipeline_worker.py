@@ -0,0 +1,168 @@
+"""
+Tests for the pipeline worker process.
+"""
+import pytest
+import asyncio
+from fastapi import HTTPException
+from ..services.pipeline_executor import PIPELINE_START_STREAM, PIPELINE_STOP_STREAM
+from ..services.pipeline_worker import PipelineWorker, _CONSUMER_GROUP
+
+@pytest.fixture
+def mock_executor(mocker):
+    """Mock pipeline executor."""
+    executor = mocker.patch('app.api.services.pipeline_worker.pipeline_executor')
+    executor.run_pipeline = mocker.AsyncMock()
+    executor.halt_pipeline = mocker.AsyncMock()
+    executor.release_pipeline = mocker.AsyncMock()
+    executor._running_pipelines = {}
+    return executor
+
+@pytest.fixture
+def mock_redis(mocker):
+    """Mock Redis client with nothing to reclaim."""
+    redis = mocker.AsyncMock()
+    redis.xautoclaim.return_value = ["0-0", [], []]
+    return redis
+
+async def test_consume_starts(mock_executor, mock_redis):
+    """Test that each start request is run and acknowledged."""
+    # Setup; the second read ends the loop
+    mock_redis.xreadgroup.side_effect = [
+        [(PIPELINE_START_STREAM, [("1-0", {"id": "1"}), ("2-0", {"id": "2"})])],
+        asyncio.CancelledError()
+    ]
+    worker = PipelineWorker()
+
+    # Execute
+    with pytest.raises(asyncio.CancelledError):
+        await worker._consume_starts(mock_redis)
+
+    # Assert
+    assert [c.args for c in mock_executor.run_pipeline.call_args_list] == [(1,), (2,)]
+    assert all(c.kwargs == {"resume": False} for c in mock_executor.run_pipeline.call_args_list)
+    assert [c.args for c in mock_redis.xack.call_args_list] == [
+        (PIPELINE_START_STREAM, _CONSUMER_GROUP, "1-0"),
+        (PIPELINE_START_STREAM, _CONSUMER_GROUP, "2-0")
+    ]
+    assert mock_redis.xreadgroup.call_args.args[:3] == (
+        _CONSUMER_GROUP, worker._name, {PIPELINE_START_STREAM: ">"}
+    )
+
+async def test_consume_starts_acks_rejected_start(mock_executor, mock_redis):
+    """Test that a start the executor rejects is still acknowledged."""
+    # Setup
+    mock_executor.run_pipeline.side_effect = HTTPException(
+        status_code=400, detail="Pipeline is already running"
+    )
+    mock_redis.xreadgroup.side_effect = [
+        [(PIPELINE_START_STREAM, [("1-0", {"id": "1"})])],
+        asyncio.CancelledError()
+    ]
+
+    # Execute
+    with pytest.raises(asyncio.CancelledError):
+        await PipelineWorker()._consume_starts(mock_redis)
+
+    # Assert
+    mock_redis.xack.assert_called_once_with(PIPELINE_START_STREAM, _CONSUMER_GROUP, "1-0")
+
+async def test_consume_starts_acks_when_run_ends(mock_executor, mock_redis, mocker):
+    """Test that a start request stays pending until its run ends."""
+    # Setup; the run is registered by run_pipeline
+    run = asyncio.get_running_loop().create_future()
+    mock_executor.run_pipeline.side_effect = lambda pipeline_id, resume: (
+        mock_executor._running_pipelines.update({pipeline_id: mocker.Mock(task=run)})
+    )
+    mock_redis.xreadgroup.side_effect = [
+        [(PIPELINE_START_STREAM, [("1-0", {"id": "1"})])],
+        asyncio.CancelledError()
+    ]
+    worker = PipelineWorker()
+
+    # Execute
+    with pytest.raises(asyncio.CancelledError):
+        await worker._consume_starts(mock_redis)
+
+    # Assert
+    mock_redis.xack.assert_not_called()
+    assert worker._entries == {1: "1-0"}
+
+    run.set_result(None)
+    await worker.drain()
+    mock_redis.xack.assert_called_once_with(PIPELINE_START_STREAM, _CONSUMER_GROUP, "1-0")
+    assert worker._entries == {}
+
+async def test_consume_starts_resumes_reclaimed(mock_executor, mock_redis):
+    """Test that a start request left by a dead worker is reclaimed and resumed."""
+    # Setup
+    mock_redis.xautoclaim.return_value = ["0-0", [("1-0", {"id": "1"})], []]
+    mock_redis.xreadgroup.side_effect = asyncio.CancelledError()
+    worker = PipelineWorker()
+
+    # Execute
+    with pytest.raises(asyncio.CancelledError):
+        await worker._consume_starts(mock_redis)
+
+    # Assert
+    mock_executor.run_pipeline.assert_called_once_with(1, resume=True)
+    assert mock_redis.xautoclaim.call_args.args == (
+        PIPELINE_START_STREAM, _CONSUMER_GROUP, worker._name
+    )
+
+async def test_consume_starts_skips_stopped(mock_executor, mock_redis):
+    """Test that a start stopped while queued is dropped."""
+    # Setup; pipeline 1 was stopped after its start was queued
+    mock_redis.xautoclaim.return_value = ["0-0", [("1-0", {"id": "1"})], []]
+    mock_redis.xreadgroup.side_effect = [
+        [(PIPELINE_START_STREAM, [("2-0", {"id": "2"}), ("5-0", {"id": "2"})])],
+        asyncio.CancelledError()
+    ]
+    worker = PipelineWorker()
+    worker._stops = {1: (3, 0), 2: (3, 0)}
+
+    # Execute
+    with pytest.raises(asyncio.CancelledError):
+        await worker._consume_starts(mock_redis)
+
+    # Assert; only the start sent after the stop runs
+    mock_executor.run_pipeline.assert_called_once_with(2, resume=False)
+    # The reclaimed run no longer marks the pipeline running
+    mock_executor.release_pipeline.assert_called_once_with(1)
+    assert mock_redis.xack.call_count == 3
+
+async def test_consume_stops(mock_executor, mock_redis, mocker):
+    """Test that only pipelines running on this worker are halted."""
+    # Setup; pipeline 1 runs here, pipeline 2 elsewhere
+    mock_executor._running_pipelines = {1: mocker.Mock()}
+    mock_redis.xread.side_effect = [
+        [(PIPELINE_STOP_STREAM, [("1-0", {"id": "1"}), ("2-0", {"id": "2"})])],
+        asyncio.CancelledError()
+    ]
+    worker = PipelineWorker()
+
+    # Execute
+    with pytest.raises(asyncio.CancelledError):
+        await worker._consume_stops(mock_redis, "0")
+    await worker.drain()
+
+    # Assert
+    mock_executor.halt_pipeline.assert_called_once_with(1)
+    # Both stops are kept for starts still queued
+    assert worker._stops == {1: (1, 0), 2: (2, 0)}
+    first_read, second_read = mock_redis.xread.call_args_list
+    assert first_read.args == ({PIPELINE_STOP_STREAM: "0"},)
+    # Reading resumes after the last entry seen
+    assert second_read.args == ({PIPELINE_STOP_STREAM: "2-0"},)
+
+async def test_load_stops(mock_redis):
+    """Test that stops sent before the worker started are recorded."""
+    # Setup
+    mock_redis.xrange.return_value = [("1-0", {"id": "1"}), ("4-2", {"id": "1"})]
+    worker = PipelineWorker()
+
+    # Execute
+    last_id = await worker._load_stops(mock_redis)
+
+    # Assert
+    assert last_id == "4-2"
+    assert worker._stops == {1: (4, 2)}
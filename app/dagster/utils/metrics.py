@@ -11,7 +11,7 @@ async def get_performance_metrics(start_time: datetime, end_time: datetime) -> D
         query = """
         SELECT metric_name, value, timestamp
         FROM performance_metrics
-        WHERE timestamp >= $1 AND timestamp < $2
+        WHERE timestamp >= :start_time AND timestamp < :end_time
         ORDER BY timestamp ASC
         """
         
@@ -39,7 +39,7 @@ async def get_video_metrics(start_time: datetime, end_time: datetime) -> Dict[st
         query = """
         SELECT metric_name, value, timestamp
         FROM video_metrics
-        WHERE timestamp >= $1 AND timestamp < $2
+        WHERE timestamp >= :start_time AND timestamp < :end_time
         ORDER BY timestamp ASC
         """
         
@@ -171,5 +171,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        loop="uvloop",
         log_config=log_config
     ) 
\ No newline at end of file
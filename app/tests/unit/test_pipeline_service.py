@@ -1,7 +1,8 @@
 import pytest
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 from app.api.services.pipeline import (
     PipelineService,
     EventProcessor,
@@ -10,69 +11,139 @@ from app.api.services.pipeline import (
     LogProcessor
 )
 
+def _event(event_id):
+    """A valid event message."""
+    return {
+        "event_id": event_id,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "event_type": "click",
+        "event_name": "button_click",
+        "properties": {"button_id": "submit"}
+    }
+
+@pytest.fixture
+def mock_db_pool():
+    """Mock database pool with NATS and ClickHouse connections."""
+    with patch('app.api.services.pipeline.db_pool') as pool:
+        nc = AsyncMock()
+        pool.nats_connection.return_value.__aenter__.return_value = nc
+        pool.clickhouse_connection.return_value.__aenter__.return_value = MagicMock()
+        yield pool
+
 @pytest.mark.asyncio
 async def test_pipeline_service_init():
     """Test pipeline service initialization."""
-    processor = EventProcessor("test_events", ["user_events"])
+    processor = EventProcessor("test_events", ["user_events"], batch_size=10)
     assert processor.name == "test_events"
     assert processor.topics == ["user_events"]
-    assert processor._stop is False
-    assert len(processor._tasks) == 0
+    assert not processor._stop_evt.is_set()
+    assert processor._flush_task is None
+    assert processor._stats_task is None
+    # The batch buffer is allocated up front and filled up to _count
+    assert processor._buffer == [None] * 10
+    assert processor._count == 0
 
 @pytest.mark.asyncio
-async def test_pipeline_service_start():
+async def test_pipeline_service_start(mock_db_pool):
     """Test pipeline service start."""
     processor = EventProcessor("test_events", ["user_events"])
     await processor.start()
-    assert len(processor._tasks) == 1
-    assert not processor._stop
+    nc = mock_db_pool.nats_connection.return_value.__aenter__.return_value
+    nc.subscribe.assert_called_once()
+    assert nc.subscribe.call_args.args == ("user_events",)
+    assert nc.subscribe.call_args.kwargs["queue"] == "test_events"
+    assert len(processor._subscriptions) == 1
+    assert processor._flush_task is not None
+    assert processor._stats_task is not None
     await processor.stop()  # Cleanup
 
 @pytest.mark.asyncio
-async def test_pipeline_service_stop():
+async def test_pipeline_service_stop(mock_db_pool):
     """Test pipeline service stop."""
     processor = EventProcessor("test_events", ["user_events"])
     await processor.start()
     await processor.stop()
-    assert processor._stop is True
-    assert len(processor._tasks) == 0
+    assert processor._stop_evt.is_set()
+    assert processor._flush_task is None
+    assert processor._stats_task is None
+    assert processor._subscriptions == []
+    assert processor._client is None
 
 @pytest.mark.asyncio
 async def test_event_processor():
     """Test EventProcessor functionality."""
-    with patch('app.api.services.pipeline.get_clickhouse_client') as mock_ch_client:
-        # Setup mocks
-        mock_client = AsyncMock()
-        mock_ch_client.return_value.__aenter__.return_value = mock_client
-
-        # Create processor
-        processor = EventProcessor("test_events", ["user_events"])
+    processor = EventProcessor("test_events", ["user_events"], batch_size=3)
+    buffer = processor._buffer
+    with patch.object(processor, "_get_client", AsyncMock()), \
+            patch.object(processor, "_store_events", AsyncMock()) as mock_store:
+        # Events fill the preallocated slots until the batch is full
+        await processor.process_message("user_events", _event("test-1"))
+        await processor.process_message("user_events", _event("test-2"))
+        assert processor._count == 2
+        assert json.loads(processor._buffer[0])["event_id"] == "test-1"
+        mock_store.assert_not_called()
+
+        # The full batch is written as one JSONEachRow block
+        await processor.process_message("user_events", _event("test-3"))
+        mock_store.assert_called_once()
+        block = mock_store.call_args.args[1]
+        assert [json.loads(line)["event_id"] for line in block.split(b"\n")] == [
+            "test-1", "test-2", "test-3"
+        ]
+
+    # The slots are reused for the next batch
+    assert processor._count == 0
+    assert processor._buffer is buffer
+    assert len(processor._buffer) == 3
 
-        # Test message processing
-        test_data = {
-            "event_id": "test-123",
-            "timestamp": datetime.utcnow().isoformat(),
-            "event_type": "click",
-            "event_name": "button_click",
-            "properties": {"button_id": "submit"}
-        }
+@pytest.mark.asyncio
+async def test_event_processor_drops_invalid_events():
+    """Test that invalid events are dropped from the batch."""
+    processor = EventProcessor("test_events", ["user_events"], batch_size=2)
+    with patch.object(processor, "_get_client", AsyncMock()), \
+            patch.object(processor, "_store_events", AsyncMock()) as mock_store:
+        await processor.process_message("user_events", _event("test-1"))
+        await processor.process_message("user_events", {"event_id": "test-2"})
 
-        await processor.process_message("user_events", test_data)
+    block = mock_store.call_args.args[1]
+    assert [json.loads(line)["event_id"] for line in block.split(b"\n")] == ["test-1"]
 
-        # Verify ClickHouse insert was called
-        mock_client.execute.assert_called_once()
-        # Verify the query contains the event data
-        call_args = mock_client.execute.call_args[0]
-        assert "INSERT INTO events" in call_args[0]
-        assert test_data["event_id"] in str(call_args[1][0])
+@pytest.mark.asyncio
+async def test_event_processor_insert_backpressure():
+    """Test that a full batch waits for the insert in progress."""
+    processor = EventProcessor("test_events", ["user_events"], batch_size=1)
+    release = asyncio.Event()
+
+    async def slow_store(client, block):
+        await release.wait()
+
+    with patch.object(processor, "_get_client", AsyncMock()), \
+            patch.object(processor, "_store_events", AsyncMock(side_effect=slow_store)) as mock_store:
+        first = asyncio.create_task(processor.process_message("user_events", _event("test-1")))
+        while not mock_store.called:
+            await asyncio.sleep(0)
+        second = asyncio.create_task(processor.process_message("user_events", _event("test-2")))
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        # The second batch was taken from the buffer but waits on the lock
+        assert processor._insert_lock.locked()
+        assert processor._count == 0
+        assert mock_store.call_count == 1
+        assert not second.done()
+
+        release.set()
+        await asyncio.gather(first, second)
+
+    assert mock_store.call_count == 2
+    assert not processor._insert_lock.locked()
 
 @pytest.mark.asyncio
 async def test_metrics_processor():
     """Test MetricsProcessor functionality."""
-    with patch('app.api.services.pipeline.get_questdb_sender') as mock_questdb:
-        # Setup mocks
-        mock_sender = AsyncMock()
-        mock_questdb.return_value.__aenter__.return_value = mock_sender
+    with patch('app.api.services.pipeline._questdb_sender') as mock_sender:
+        sent = []
+        mock_sender.flush.side_effect = lambda buf: sent.append(bytes(buf))
 
         # Create processor
         processor = MetricsProcessor("test_metrics", ["performance_metrics"])
@@ -82,16 +153,27 @@ async def test_metrics_processor():
             "name": "response_time",
             "value": 100,
             "source": "api_server",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
 
         await processor.process_message("performance_metrics", test_data)
-
-        # Verify QuestDB writes
-        mock_sender.table.assert_called_once_with(test_data["name"])
-        mock_sender.symbol.assert_called_once_with("source", test_data["source"])
-        mock_sender.float.assert_called_once_with("value", test_data["value"])
-        mock_sender.flush.assert_called_once()
+        first = processor._buf
+        assert len(first) > 0
+        await processor._flush()
+
+        # The buffer is swapped out for the send, then cleared and kept
+        mock_sender.flush.assert_called_once_with(first)
+        assert sent[0].startswith(b"response_time,source=api_server value=100")
+        assert processor._buf is not first
+        assert processor._spare is first
+        assert len(first) == 0
+
+        # The next flush reuses the cleared buffer instead of a new one
+        await processor.process_message("performance_metrics", test_data)
+        second = processor._buf
+        await processor._flush()
+        assert processor._buf is first
+        assert processor._spare is second
 
 @pytest.mark.asyncio
 async def test_video_processor():